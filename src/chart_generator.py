@@ -11,41 +11,97 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 import os
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from matplotlib.patches import Rectangle
 import matplotlib.patches as mpatches
 from matplotlib import font_manager
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# 中文字体候选（按优先级）
+CJK_FONT_CANDIDATES = (
+    "PingFang SC", "Heiti SC", "Songti SC", "Hiragino Sans GB",
+    "Noto Sans CJK SC", "STHeiti", "Microsoft YaHei", "SimHei", "SimSun"
+)
+
+_STYLE_INITIALIZED = False
+# 已创建过的输出目录，避免重复 makedirs
+_DIRS_CREATED = set()
+# 矢量元素超过该数量时不再导出SVG（文件臃肿且写出缓慢）
+_SVG_ELEMENT_LIMIT = 5000
+
+
+# generate_all_charts 的分发表：(图表key, 分析结果key, 方法名, 是否需传核心维度, 最少行数)
+_CHART_SPECS = (
+    ('core_share', '核心维度分布', 'create_core_share_chart', True, 1),
+    ('city_share', '城市分布', 'create_city_share_chart', False, 1),
+    ('category_share', '目录分布', 'create_category_share_chart', False, 1),
+    ('major_share', '大类分布', 'create_major_share_chart', False, 1),
+    ('coverage', '覆盖分析', 'create_coverage_chart', True, 1),
+    ('correlation_heatmap', '相关性矩阵', 'create_correlation_heatmap', False, 1),
+    ('time_trend', '时间趋势', 'create_time_series_chart', False, 3),
+    ('product_structure', '产品结构', 'create_product_structure_chart', False, 1),
+)
+
+
+def _load_seaborn():
+    """按需导入 seaborn（导入较慢且会带入 scipy），未安装时返回 None"""
+    try:
+        import seaborn as sns
+    except ModuleNotFoundError:
+        return None
+    return sns
+
+
+def _set_rc(key, value):
+    """仅在取值变化时写入 rcParams（写入会触发校验与全局状态刷新）"""
+    if plt.rcParams[key] != value:
+        plt.rcParams[key] = value
+
+
+@functools.lru_cache(maxsize=1)
+def _resolve_cjk_font(candidates):
+    """在系统字体中查找首个可用的中文字体（进程内只扫描一次）"""
+    installed = {f.name for f in font_manager.fontManager.ttflist}
+    for font_name in candidates:
+        if font_name in installed:
+            return font_name
+    return None
+
+
+def _render_chart(settings, method_name, args):
+    """子进程内渲染单张图表（按设置重建生成器后调用对应方法）"""
+    generator = ChartGenerator(output_dir=settings['output_dir'], png_dpi=settings['png_dpi'])
+    generator.company_colors = settings['company_colors']
+    return getattr(generator, method_name)(*args)
 
-try:
-    import seaborn as sns
-except ModuleNotFoundError:
-    sns = None
 
 class ChartGenerator:
     """图表生成器类"""
 
-    def __init__(self, output_dir='outputs/figures'):
+    def __init__(self, output_dir='outputs/figures', png_dpi=200):
         self.output_dir = output_dir
+        # PNG 输出分辨率：默认与 savefig.dpi 一致，打印场景可调到 300
+        self.png_dpi = png_dpi
         self.setup_style()
         self.create_output_dir()
 
     def setup_style(self):
         """设置图表样式"""
-        # 中文字体设置
-        candidates = [
-            "PingFang SC", "Heiti SC", "Songti SC", "Hiragino Sans GB",
-            "Noto Sans CJK SC", "STHeiti", "Microsoft YaHei", "SimHei", "SimSun"
-        ]
-
-        installed = {f.name for f in font_manager.fontManager.ttflist}
-
-        for font_name in candidates:
-            if any(font_name in name for name in installed):
-                plt.rcParams['font.family'] = font_name
-                break
-
-        plt.rcParams['axes.unicode_minus'] = False
-        plt.rcParams['figure.dpi'] = 200
-        plt.rcParams['savefig.dpi'] = 200
+        global _STYLE_INITIALIZED
+        # 全局 rcParams 只需设置一次，重复构造时跳过
+        if not _STYLE_INITIALIZED:
+            # 中文字体设置
+            font_name = _resolve_cjk_font(CJK_FONT_CANDIDATES)
+            if font_name:
+                _set_rc('font.family', [font_name])
+
+            _set_rc('axes.unicode_minus', False)
+            _set_rc('figure.dpi', 200)
+            _set_rc('savefig.dpi', 200)
+            _STYLE_INITIALIZED = True
 
         # 颜色方案（简洁、易读）
         self.colors = ['#4C78A8', '#54A24B', '#E45756', '#F58518', '#72B7B2', '#E39C36', '#B279A2', '#9D755D']
@@ -53,19 +109,60 @@ class ChartGenerator:
 
     def create_output_dir(self):
         """创建输出目录"""
+        if self.output_dir in _DIRS_CREATED:
+            return
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(f"{self.output_dir}/png", exist_ok=True)
         os.makedirs(f"{self.output_dir}/svg", exist_ok=True)
-
-    def save_figure(self, fig, filename):
-        """保存图表为PNG和SVG格式"""
+        _DIRS_CREATED.add(self.output_dir)
+
+    def _new_fig(self, nrows=1, ncols=1, figsize=None, **kwargs):
+        """创建独立的 Figure（不经过 pyplot 全局管理器，函数返回后即可回收）"""
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        # 其余参数（subplot_kw/sharex 等）透传给 Figure.subplots
+        axes = fig.subplots(nrows, ncols, **kwargs)
+        return fig, axes
+
+    @staticmethod
+    def _metric_column(df, dim_name):
+        """取维度列和份额列之外的第一列作为指标列"""
+        exclude = {dim_name, '份额(%)'}
+        return next((c for c in df.columns if c not in exclude), None)
+
+    @staticmethod
+    def _top_k(df, col, k):
+        """取 col 最大的 k 行（argpartition 选出后只排序这 k 行，忽略缺失值）"""
+        vals = df[col].to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(vals))
+        k = min(k, len(valid))
+        if k == 0:
+            return df.iloc[[]]
+        idx = valid[np.argpartition(-vals[valid], k - 1)[:k]]
+        idx = idx[np.argsort(-vals[idx], kind='stable')]
+        return df.iloc[idx]
+
+    def _resolve_colors(self, names):
+        """按名称取配色：优先 company_colors，未指定的按位置轮换默认色"""
+        names = pd.Series(names)
+        fallback = np.array(self.colors, dtype=object)[np.arange(len(names)) % len(self.colors)]
+        mapped = names.map(self.company_colors)
+        return mapped.where(mapped.notna(), pd.Series(fallback, index=names.index)).to_list()
+
+    def save_figure(self, fig, filename, vector_element_estimate=None):
+        """保存图表为PNG和SVG格式（矢量元素过多时只输出PNG）"""
+        # 各图表已调用 fig.tight_layout()，这里不再用 bbox_inches='tight' 额外测量一遍
         # PNG格式
         png_path = f"{self.output_dir}/png/{filename}.png"
-        fig.savefig(png_path, format='png', bbox_inches='tight', dpi=300)
+        fig.savefig(png_path, format='png', dpi=self.png_dpi)
+
+        if vector_element_estimate is not None and vector_element_estimate > _SVG_ELEMENT_LIMIT:
+            print(f"SVG skipped: {filename} 约 {vector_element_estimate} 个元素")
+            return {'png': png_path}
 
         # SVG格式
         svg_path = f"{self.output_dir}/svg/{filename}.svg"
-        fig.savefig(svg_path, format='svg', bbox_inches='tight')
+        fig.savefig(svg_path, format='svg')
 
         return {'png': png_path, 'svg': svg_path}
 
@@ -81,14 +178,17 @@ class ChartGenerator:
         Returns:
             dict: 图表路径
         """
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        if data is None or data.empty:
+            return {}
+        fig, (ax1, ax2) = self._new_fig(1, 2, figsize=(16, 8))
 
         # 饼图
-        colors = [self.company_colors.get(brand, self.colors[i % len(self.colors)])
-                 for i, brand in enumerate(data['品牌名称'])]
+        colors = self._resolve_colors(data['品牌名称'])
 
-        wedges, texts, autotexts = ax1.pie(data['总量'], labels=data['品牌名称'],
-                                          autopct='%1.1f%%', colors=colors, startangle=90)
+        totals = data['总量'].to_numpy(dtype=float)
+        pcts = totals / totals.sum() * 100
+        labels = [f'{brand}\n{pct:.1f}%' for brand, pct in zip(data['品牌名称'], pcts)]
+        ax1.pie(totals, labels=labels, colors=colors, startangle=90)
         ax1.set_title(f'{title} - 占比分布', fontsize=14, fontweight='bold')
 
         # 条形图
@@ -97,20 +197,19 @@ class ChartGenerator:
         ax2.set_title(f'{title} - 排名', fontsize=14, fontweight='bold')
 
         # 高亮目标公司
-        if highlight_company in data['品牌名称'].values:
-            idx = data[data['品牌名称'] == highlight_company].index[0]
-            bars[idx].set_color('#FF4444')
-            bars[idx].set_edgecolor('black')
-            bars[idx].set_linewidth(2)
+        # 一次比较定位目标所在位置（条形按行序绘制，按位置取条形）
+        hits = np.flatnonzero(data['品牌名称'].to_numpy() == highlight_company)
+        if hits.size:
+            bar = bars[int(hits[0])]
+            bar.set_color('#FF4444')
+            bar.set_edgecolor('black')
+            bar.set_linewidth(2)
 
         # 添加数值标签
-        for i, (bar, share) in enumerate(zip(bars, data['市场份额'])):
-            ax2.text(bar.get_width() + 0.5, bar.get_y() + bar.get_height()/2,
-                    f'{share:.1f}%', va='center', fontsize=10)
+        ax2.bar_label(bars, labels=[f'{share:.1f}%' for share in data['市场份额']], padding=5, fontsize=10)
 
-        plt.tight_layout()
+        fig.tight_layout()
         paths = self.save_figure(fig, 'market_share')
-        plt.close()
 
         return paths
 
@@ -145,38 +244,32 @@ class ChartGenerator:
             return {}
 
         company_label = company_name or '目标对象'
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 12))
+        fig, (ax1, ax2) = self._new_fig(2, 1, figsize=(14, 12), sharex=True)
 
         # 城市容量排名
-        top_cities = city_data.nlargest(15, total_col)
-        bars1 = ax1.bar(range(len(top_cities)), top_cities[total_col],
-                       color='#4ECDC4', alpha=0.8)
-        ax1.set_xticks(range(len(top_cities)))
-        ax1.set_xticklabels(top_cities[city_col], rotation=45, ha='right')
+        top_cities = self._top_k(city_data, total_col, 15)
+        x = np.arange(len(top_cities))
+        totals = top_cities[total_col].to_numpy()
+        shares = top_cities[share_col].to_numpy()
+        bars1 = ax1.bar(x, totals, color='#4ECDC4', alpha=0.8)
         ax1.set_ylabel('市场容量', fontsize=12)
         ax1.set_title('TOP15城市市场容量', fontsize=14, fontweight='bold')
 
         # 添加数值标签
-        for bar, value in zip(bars1, top_cities[total_col]):
-            ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + value*0.01,
-                    f'{value:,.0f}', ha='center', va='bottom', fontsize=9)
+        ax1.bar_label(bars1, labels=[f'{value:,.0f}' for value in totals], padding=3, fontsize=9)
 
-        # 目标对象份额
-        bars2 = ax2.bar(range(len(top_cities)), top_cities[share_col],
-                       color='#FF6B6B', alpha=0.8)
-        ax2.set_xticks(range(len(top_cities)))
+        # 目标对象份额（与上图共用x轴，刻度只在下图设置一次）
+        bars2 = ax2.bar(x, shares, color='#FF6B6B', alpha=0.8)
+        ax2.set_xticks(x)
         ax2.set_xticklabels(top_cities[city_col], rotation=45, ha='right')
         ax2.set_ylabel(f'{company_label}市场份额 (%)', fontsize=12)
         ax2.set_title(f'{company_label}在TOP15城市的份额', fontsize=14, fontweight='bold')
 
         # 添加份额标签
-        for bar, value in zip(bars2, top_cities[share_col]):
-            ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5,
-                    f'{value:.1f}%', ha='center', va='bottom', fontsize=9)
+        ax2.bar_label(bars2, labels=[f'{value:.1f}%' for value in shares], padding=3, fontsize=9)
 
-        plt.tight_layout()
+        fig.tight_layout()
         paths = self.save_figure(fig, 'city_opportunities')
-        plt.close()
 
         return paths
 
@@ -191,6 +284,8 @@ class ChartGenerator:
         Returns:
             dict: 图表路径
         """
+        if coverage_data is None or coverage_data.empty:
+            return {}
         entity_count_col = next((col for col in ['覆盖实体数', '覆盖医院数'] if col in coverage_data.columns), None)
         avg_col = next((col for col in ['单实体均量', '单院均量'] if col in coverage_data.columns), None)
         brand_col = next((col for col in ['品牌名称', '申报企业名称', '申报企业', '企业名称'] if col in coverage_data.columns), None)
@@ -200,16 +295,15 @@ class ChartGenerator:
         if '覆盖对象类型' in coverage_data.columns and coverage_data['覆盖对象类型'].notna().any():
             entity_label = str(coverage_data['覆盖对象类型'].dropna().iloc[0]).strip() or entity_label
 
-        fig, ax = plt.subplots(figsize=(12, 8))
+        fig, ax = self._new_fig(figsize=(12, 8))
 
-        # 散点图
-        ax.scatter(
-            coverage_data[entity_count_col],
-            coverage_data[avg_col],
-            s=coverage_data['总量'] / 1000,
-            alpha=0.6,
-            c=self.colors[:len(coverage_data)]
-        )
+        # 散点图（先转为 numpy 数组，颜色按位置轮换，超过调色板长度也不报错）
+        xs = coverage_data[entity_count_col].to_numpy(dtype=float)
+        ys = coverage_data[avg_col].to_numpy(dtype=float)
+        sizes = coverage_data['总量'].to_numpy(dtype=float) / 1000
+        palette = matplotlib.colors.to_rgba_array(self.colors)
+        ax.scatter(xs, ys, s=sizes, alpha=0.6,
+                   c=palette[np.arange(len(coverage_data)) % len(palette)])
 
         # 高亮目标公司
         company_data = coverage_data[coverage_data[brand_col] == company_name]
@@ -230,18 +324,16 @@ class ChartGenerator:
         ax.set_title('品牌覆盖-效率分析（气泡大小=总业务量）', fontsize=14, fontweight='bold')
 
         # 添加品牌标签
-        for _, row in coverage_data.iterrows():
-            ax.annotate(row[brand_col],
-                       (row[entity_count_col], row[avg_col]),
+        for name, x, y in zip(coverage_data[brand_col].to_numpy(), xs, ys):
+            ax.annotate(name, (x, y),
                        xytext=(5, 5), textcoords='offset points',
                        fontsize=9, alpha=0.8)
 
         ax.grid(True, alpha=0.3)
         ax.legend()
 
-        plt.tight_layout()
-        paths = self.save_figure(fig, 'coverage_analysis')
-        plt.close()
+        fig.tight_layout()
+        paths = self.save_figure(fig, 'coverage_analysis', vector_element_estimate=len(coverage_data))
 
         return paths
 
@@ -255,38 +347,41 @@ class ChartGenerator:
         Returns:
             dict: 图表路径
         """
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        if structure_data is None or structure_data.empty:
+            return {}
+        fig, (ax1, ax2) = self._new_fig(1, 2, figsize=(16, 8))
 
         # 准备数据
         if '产品类型' in structure_data.columns:
             df_plot = structure_data.set_index('产品类型')
         else:
             df_plot = structure_data
+        # 两张子图共用同一组品牌配色，只解析一次
+        colors = self._resolve_colors(df_plot.columns)
 
         # 堆叠条形图
-        df_plot.plot(kind='bar', stacked=True, ax=ax1,
-                    color=[self.company_colors.get(col, self.colors[i])
-                          for i, col in enumerate(df_plot.columns)])
+        df_plot.plot(kind='bar', stacked=True, ax=ax1, color=colors)
         ax1.set_title('产品结构对比（总量）', fontsize=14, fontweight='bold')
         ax1.set_xlabel('产品类型', fontsize=12)
         ax1.set_ylabel('采购量', fontsize=12)
         ax1.legend(title='品牌', bbox_to_anchor=(1.05, 1), loc='upper left')
         ax1.tick_params(axis='x', rotation=0)
 
-        # 百分比堆叠图
-        df_pct = df_plot.div(df_plot.sum(axis=1), axis=0) * 100
-        df_pct.plot(kind='bar', stacked=True, ax=ax2,
-                   color=[self.company_colors.get(col, self.colors[i])
-                         for i, col in enumerate(df_plot.columns)])
+        # 百分比堆叠图（先复制：float64 单块数据时 to_numpy 返回视图，原地除会改写传入的数据）
+        arr = df_plot.to_numpy(dtype=np.float64, copy=True)
+        row_sums = arr.sum(axis=1, keepdims=True)
+        np.divide(arr, row_sums, out=arr, where=row_sums != 0)
+        arr *= 100
+        df_pct = pd.DataFrame(arr, index=df_plot.index, columns=df_plot.columns)
+        df_pct.plot(kind='bar', stacked=True, ax=ax2, color=colors)
         ax2.set_title('产品结构对比（占比）', fontsize=14, fontweight='bold')
         ax2.set_xlabel('产品类型', fontsize=12)
         ax2.set_ylabel('占比 (%)', fontsize=12)
         ax2.legend(title='品牌', bbox_to_anchor=(1.05, 1), loc='upper left')
         ax2.tick_params(axis='x', rotation=0)
 
-        plt.tight_layout()
+        fig.tight_layout()
         paths = self.save_figure(fig, 'product_structure')
-        plt.close()
 
         return paths
 
@@ -301,7 +396,9 @@ class ChartGenerator:
         Returns:
             dict: 图表路径
         """
-        fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
+        if not metrics_data:
+            return {}
+        fig, ax = self._new_fig(figsize=(10, 10), subplot_kw=dict(projection='polar'))
 
         # 准备数据
         categories = list(metrics_data.keys())
@@ -325,9 +422,8 @@ class ChartGenerator:
         # 添加网格
         ax.grid(True)
 
-        plt.tight_layout()
+        fig.tight_layout()
         paths = self.save_figure(fig, 'competition_radar')
-        plt.close()
 
         return paths
 
@@ -337,25 +433,22 @@ class ChartGenerator:
         if data.empty:
             return {}
 
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+        fig, (ax1, ax2) = self._new_fig(1, 2, figsize=(16, 6))
 
-        ax1.barh(data['字段'], data['均值'], color=self.colors[:len(data)])
+        bars1 = ax1.barh(data['字段'], data['均值'], color=self.colors[:len(data)])
         ax1.set_title('Top数值指标均值', fontsize=14, fontweight='bold')
         ax1.set_xlabel('均值')
         ax1.invert_yaxis()
-        for i, value in enumerate(data['均值']):
-            ax1.text(value, i, f"{value:.2f}", va='center', ha='left', fontsize=9)
+        ax1.bar_label(bars1, labels=[f"{value:.2f}" for value in data['均值']], fontsize=9)
 
-        ax2.barh(data['字段'], data['标准差'], color=self.colors[-len(data):])
+        bars2 = ax2.barh(data['字段'], data['标准差'], color=self.colors[-len(data):])
         ax2.set_title('波动度（标准差）', fontsize=14, fontweight='bold')
         ax2.set_xlabel('标准差')
         ax2.invert_yaxis()
-        for i, value in enumerate(data['标准差']):
-            ax2.text(value, i, f"{value:.2f}", va='center', ha='left', fontsize=9)
+        ax2.bar_label(bars2, labels=[f"{value:.2f}" for value in data['标准差']], fontsize=9)
 
-        plt.tight_layout()
+        fig.tight_layout()
         paths = self.save_figure(fig, 'numeric_overview')
-        plt.close()
         return paths
 
     # 市场视角核心图表（按指标汇总）
@@ -363,71 +456,73 @@ class ChartGenerator:
         dfx = data.head(15).copy()
         if dfx.empty:
             return {}
-        metric_col = [c for c in dfx.columns if c not in [dim_name, '份额(%)']][0]
-        fig, ax = plt.subplots(figsize=(8, 5))
-        ax.barh(dfx[dim_name], dfx[metric_col], color=self.colors[0])
+        metric_col = self._metric_column(dfx, dim_name)
+        if metric_col is None:
+            return {}
+        fig, ax = self._new_fig(figsize=(8, 5))
+        bars = ax.barh(dfx[dim_name], dfx[metric_col], color=self.colors[0])
         ax.invert_yaxis()
         ax.set_title(f"{dim_name} 份额（按{metric_col}，前15）", fontsize=14, fontweight='bold')
         ax.set_xlabel(metric_col)
-        for i, (v, s) in enumerate(zip(dfx[metric_col], dfx.get('份额(%)', [None]*len(dfx)))):
-            label = f" {v:,.0f}"
-            if s is not None:
-                label += f"（{s:.2f}%）"
-            ax.text(v, i, label, va="center", fontsize=9)
-        plt.tight_layout()
+        labels = [f"{v:,.0f}" if s is None else f"{v:,.0f}（{s:.2f}%）"
+                  for v, s in zip(dfx[metric_col], dfx.get('份额(%)', [None]*len(dfx)))]
+        ax.bar_label(bars, labels=labels, padding=3, fontsize=9)
+        fig.tight_layout()
         return self.save_figure(fig, 'core_share_top15')
 
     def create_city_share_chart(self, data):
         dfx = data.head(15).copy()
         if dfx.empty:
             return {}
-        metric_col = [c for c in dfx.columns if c not in ['城市', '份额(%)']][0]
-        fig, ax = plt.subplots(figsize=(8, 5))
-        ax.barh(dfx['城市'], dfx[metric_col], color=self.colors[1])
+        metric_col = self._metric_column(dfx, '城市')
+        if metric_col is None:
+            return {}
+        fig, ax = self._new_fig(figsize=(8, 5))
+        bars = ax.barh(dfx['城市'], dfx[metric_col], color=self.colors[1])
         ax.invert_yaxis()
         ax.set_title("城市分布（按量，前15）", fontsize=14, fontweight='bold')
         ax.set_xlabel(metric_col)
-        for i, v in enumerate(dfx[metric_col]):
-            ax.text(v, i, f" {v:,.0f}", va="center", fontsize=9)
-        plt.tight_layout()
+        ax.bar_label(bars, labels=[f"{v:,.0f}" for v in dfx[metric_col]], padding=3, fontsize=9)
+        fig.tight_layout()
         return self.save_figure(fig, 'city_share_top15')
 
     def create_category_share_chart(self, data):
         dfx = data.head(12).copy()
         if dfx.empty:
             return {}
-        metric_col = [c for c in dfx.columns if c not in ['目录名称', '份额(%)']][0]
-        fig, ax = plt.subplots(figsize=(9, 6))
-        ax.barh(dfx['目录名称'], dfx[metric_col], color=self.colors[2])
+        metric_col = self._metric_column(dfx, '目录名称')
+        if metric_col is None:
+            return {}
+        fig, ax = self._new_fig(figsize=(9, 6))
+        bars = ax.barh(dfx['目录名称'], dfx[metric_col], color=self.colors[2])
         ax.invert_yaxis()
         ax.set_title("目录份额（前12）", fontsize=14, fontweight='bold')
         ax.set_xlabel(metric_col)
-        for i, (v, s) in enumerate(zip(dfx[metric_col], dfx.get('份额(%)', [None]*len(dfx)))):
-            label = f" {v:,.0f}"
-            if s is not None:
-                label += f"（{s:.2f}%）"
-            ax.text(v, i, label, va="center", fontsize=8)
-        plt.tight_layout()
+        labels = [f"{v:,.0f}" if s is None else f"{v:,.0f}（{s:.2f}%）"
+                  for v, s in zip(dfx[metric_col], dfx.get('份额(%)', [None]*len(dfx)))]
+        ax.bar_label(bars, labels=labels, padding=3, fontsize=8)
+        fig.tight_layout()
         return self.save_figure(fig, 'category_share_top12')
 
     def create_major_share_chart(self, data):
         dfx = data.head(10).copy()
         if dfx.empty:
             return {}
-        metric_col = [c for c in dfx.columns if c not in ['产品大类', '份额(%)']][0]
-        fig, ax = plt.subplots(figsize=(8, 5))
-        ax.bar(dfx['产品大类'], dfx[metric_col], color=self.colors[3])
+        metric_col = self._metric_column(dfx, '产品大类')
+        if metric_col is None:
+            return {}
+        fig, ax = self._new_fig(figsize=(8, 5))
+        bars = ax.bar(dfx['产品大类'], dfx[metric_col], color=self.colors[3])
         ax.set_title("产品大类分布（前10）", fontsize=14, fontweight='bold')
         ax.set_ylabel(metric_col)
         ax.tick_params(axis="x", labelrotation=35)
         for lbl in ax.get_xticklabels():
             lbl.set_ha("right")
-        for x, v, s in zip(range(len(dfx)), dfx[metric_col], dfx.get('份额(%)', [None]*len(dfx))):
-            label = f"{v:,.0f}"
-            if s is not None:
-                label += f"\\n{s:.2f}%"
-            ax.text(x, v, label, ha="center", va="bottom", fontsize=9)
-        plt.tight_layout()
+        labels = [f"{v:,.0f}" if s is None else f"{v:,.0f}\n{s:.2f}%"
+                  for v, s in zip(dfx[metric_col], dfx.get('份额(%)', [None]*len(dfx)))]
+        ax.bar_label(bars, labels=labels, fontsize=9)
+        ax.margins(y=0.12)  # 为两行标签留出顶部空间
+        fig.tight_layout()
         return self.save_figure(fig, 'major_share_top10')
 
     def create_coverage_chart(self, data, dim_name):
@@ -439,7 +534,7 @@ class ChartGenerator:
         entity_label = '重点实体'
         if '覆盖对象类型' in dfx.columns and dfx['覆盖对象类型'].notna().any():
             entity_label = str(dfx['覆盖对象类型'].dropna().iloc[0]).strip() or entity_label
-        fig, ax1 = plt.subplots(figsize=(8, 5))
+        fig, ax1 = self._new_fig(figsize=(8, 5))
         ax1.bar(dfx[dim_name], dfx[entity_count_col], color=self.colors[4])
         ax1.set_ylabel(f"覆盖{entity_label}数")
         ax1.set_title(f"{dim_name} 覆盖与单{entity_label}均量（前15）", fontsize=14, fontweight='bold')
@@ -449,7 +544,7 @@ class ChartGenerator:
         ax2 = ax1.twinx()
         ax2.plot(dfx[dim_name], dfx[avg_col], color=self.colors[5], marker="o")
         ax2.set_ylabel(f"单{entity_label}均量")
-        plt.tight_layout()
+        fig.tight_layout()
         return self.save_figure(fig, 'coverage_top15')
 
     def create_categorical_topn_chart(self, categorical_data, top_n=10):
@@ -459,7 +554,9 @@ class ChartGenerator:
             return {}
 
         data['字段类别'] = data['字段'] + ' - ' + data['类别']
-        fig, ax = plt.subplots(figsize=(14, 8))
+        labels = [f"{v:.1f}%" for v in data['占比(%)']]
+        fig, ax = self._new_fig(figsize=(14, 8))
+        sns = _load_seaborn()
         if sns is not None:
             sns.barplot(data=data, x='数量', y='字段类别', palette=self.colors[:len(data)], ax=ax)
         else:
@@ -467,21 +564,26 @@ class ChartGenerator:
         ax.set_title('分类TopN分布', fontsize=14, fontweight='bold')
         ax.set_xlabel('数量')
         ax.set_ylabel('')
-        for p, (_, row) in zip(ax.patches, data.iterrows()):
-            ax.text(p.get_width() + max(data['数量']) * 0.01, p.get_y() + p.get_height()/2,
-                    f"{row['占比(%)']:.1f}%", va='center', fontsize=9)
+        # seaborn 按类别着色时每个类别一个容器，按顺序切分标签
+        offset = 0
+        for container in ax.containers:
+            ax.bar_label(container, labels=labels[offset:offset + len(container)], padding=3, fontsize=9)
+            offset += len(container)
 
-        plt.tight_layout()
+        fig.tight_layout()
         paths = self.save_figure(fig, 'categorical_topn')
-        plt.close()
         return paths
 
     def create_correlation_heatmap(self, corr_matrix):
         """创建相关性热力图"""
-        fig, ax = plt.subplots(figsize=(10, 8))
+        if corr_matrix is None or corr_matrix.empty:
+            return {}
+        fig, ax = self._new_fig(figsize=(10, 8))
+        sns = _load_seaborn()
         if sns is not None:
+            # 色块栅格化：SVG 中以单张位图嵌入，数字标注仍保持矢量
             sns.heatmap(corr_matrix, cmap='RdYlBu', annot=True, fmt='.2f',
-                        linewidths=0.5, ax=ax, cbar_kws={'shrink': .5})
+                        linewidths=0.5, ax=ax, cbar_kws={'shrink': .5}, rasterized=True)
         else:
             im = ax.imshow(corr_matrix.values, cmap='RdYlBu', aspect='auto')
             ax.set_xticks(range(len(corr_matrix.columns)))
@@ -493,9 +595,8 @@ class ChartGenerator:
                     ax.text(c, r, f"{corr_matrix.iloc[r, c]:.2f}", ha='center', va='center', fontsize=8)
             fig.colorbar(im, ax=ax, shrink=0.5)
         ax.set_title('指标相关性矩阵', fontsize=14, fontweight='bold')
-        plt.tight_layout()
-        paths = self.save_figure(fig, 'correlation_heatmap')
-        plt.close()
+        fig.tight_layout()
+        paths = self.save_figure(fig, 'correlation_heatmap', vector_element_estimate=corr_matrix.size)
         return paths
 
     def create_time_series_chart(self, time_trend):
@@ -503,7 +604,7 @@ class ChartGenerator:
         if time_trend.empty:
             return {}
 
-        fig, ax = plt.subplots(figsize=(14, 6))
+        fig, ax = self._new_fig(figsize=(14, 6))
         ax.plot(time_trend['时间'], time_trend['数值'], marker='o',
                 color='#4ECDC4', linewidth=2)
         ax.fill_between(time_trend['时间'], time_trend['数值'],
@@ -512,18 +613,57 @@ class ChartGenerator:
         ax.set_xlabel('时间')
         ax.set_ylabel('数值')
         ax.grid(True, alpha=0.3)
-        plt.tight_layout()
+        fig.tight_layout()
         paths = self.save_figure(fig, 'time_trend')
-        plt.close()
         return paths
 
-    def generate_all_charts(self, analysis_results, company_name=''):
+    def _render_tasks(self, tasks, max_workers=1):
+        """
+        渲染图表任务列表，max_workers 大于 1 时用多进程并行
+
+        并行由调用方显式开启。工作进程经 forkserver（不支持时用 spawn）启动，不从当前进程 fork，
+        不受调用方已有线程（含 pyarrow/polars 等的原生线程）影响。进程池不可用时按顺序渲染。
+        单张图失败只跳过该图。
+        """
+        workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+        results = []
+        if workers > 1:
+            settings = {
+                'output_dir': self.output_dir,
+                'png_dpi': self.png_dpi,
+                'company_colors': dict(self.company_colors),
+            }
+            try:
+                start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                with ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context(start_method)) as executor:
+                    futures = [(key, executor.submit(_render_chart, settings, method_name, args))
+                               for key, method_name, args in tasks]
+                    for key, future in futures:
+                        try:
+                            results.append((key, future.result()))
+                        except Exception as e:
+                            print(f"图表 {key} 生成失败: {e}")
+                return dict(results)
+            except OSError as e:
+                print(f"并行渲染不可用，改为顺序生成: {e}")
+                results = []
+
+        for key, method_name, args in tasks:
+            try:
+                results.append((key, getattr(self, method_name)(*args)))
+            except Exception as e:
+                print(f"图表 {key} 生成失败: {e}")
+        return dict(results)
+
+    def generate_all_charts(self, analysis_results, company_name='', max_workers=1):
         """
         生成所有图表
 
         Args:
             analysis_results: 分析结果
             company_name: 公司名称
+            max_workers: 并行渲染进程数上限（默认 1 即顺序渲染，None 为 CPU 核数）
 
         Returns:
             dict: 所有图表路径
@@ -532,40 +672,15 @@ class ChartGenerator:
 
         try:
             core_dim = analysis_results.get('核心维度')
+            # 先收集要画的图（key, 方法名, 参数），再统一渲染
+            tasks = []
 
-            # 市场部优先图：核心维度/城市/目录/大类/覆盖
-            core_share = analysis_results.get('核心维度分布')
-            if core_share is not None and not core_share.empty and core_dim:
-                chart_paths['core_share'] = self.create_core_share_chart(core_share, core_dim)
-
-            city_share = analysis_results.get('城市分布')
-            if city_share is not None and not city_share.empty:
-                chart_paths['city_share'] = self.create_city_share_chart(city_share)
-
-            category_share = analysis_results.get('目录分布')
-            if category_share is not None and not category_share.empty:
-                chart_paths['category_share'] = self.create_category_share_chart(category_share)
-
-            major_share = analysis_results.get('大类分布')
-            if major_share is not None and not major_share.empty:
-                chart_paths['major_share'] = self.create_major_share_chart(major_share)
-
-            coverage = analysis_results.get('覆盖分析')
-            if coverage is not None and not coverage.empty and core_dim:
-                chart_paths['coverage'] = self.create_coverage_chart(coverage, core_dim)
-
-            # 机会/结构/时间/相关性：有意义时再补
-            corr_matrix = analysis_results.get('相关性矩阵')
-            if corr_matrix is not None:
-                chart_paths['correlation_heatmap'] = self.create_correlation_heatmap(corr_matrix)
-
-            time_trend = analysis_results.get('时间趋势')
-            if time_trend is not None and not time_trend.empty and len(time_trend) > 2:
-                chart_paths['time_trend'] = self.create_time_series_chart(time_trend)
-
-            if '产品结构' in analysis_results and not analysis_results['产品结构'].empty:
-                chart_paths['product_structure'] = self.create_product_structure_chart(
-                    analysis_results['产品结构'])
+            # 市场部优先图（核心维度/城市/目录/大类/覆盖），其后为相关性/时间/结构
+            for key, result_key, method_name, with_dim, min_rows in _CHART_SPECS:
+                data = analysis_results.get(result_key)
+                if data is None or len(data) < min_rows or (with_dim and not core_dim):
+                    continue
+                tasks.append((key, method_name, (data, core_dim) if with_dim else (data,)))
 
             # 机会城市/医院等（若后续需要，可在有字段时扩展）
             opportunity_city = None
@@ -575,23 +690,24 @@ class ChartGenerator:
                     opportunity_city = candidate
                     break
             if opportunity_city is not None:
-                chart_paths['city_opportunities'] = self.create_city_heatmap(
-                    opportunity_city, company_name)
+                tasks.append(('city_opportunities', 'create_city_heatmap', (opportunity_city, company_name)))
 
             # 兜底：若未生成任何业务图，再回退到数值/分类概览
-            if not chart_paths:
+            if not tasks:
                 numeric_data = analysis_results.get('数值列统计')
                 if numeric_data is not None and not numeric_data.empty and len(numeric_data) > 1:
                     has_variation = (numeric_data['标准差'].fillna(0).abs() > 0).any()
                     if has_variation:
-                        chart_paths['numeric_overview'] = self.create_numeric_overview_chart(numeric_data)
+                        tasks.append(('numeric_overview', 'create_numeric_overview_chart', (numeric_data,)))
                 categorical_data = analysis_results.get('分类分布')
                 if core_dim and categorical_data is not None and not categorical_data.empty:
                     data_core = categorical_data[categorical_data['字段'] == core_dim]
                     if not data_core.empty:
                         total = data_core['数量'].sum()
                         if total > 0 and data_core['数量'].max() > 1:
-                            chart_paths['categorical_topn'] = self.create_categorical_topn_chart(data_core)
+                            tasks.append(('categorical_topn', 'create_categorical_topn_chart', (data_core,)))
+
+            chart_paths = self._render_tasks(tasks, max_workers)
 
         except Exception as e:
             print(f"图表生成过程中出现错误: {e}")
@@ -9,20 +9,250 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import font_manager
+import os
+import functools
+import importlib.util
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 warnings.filterwarnings('ignore')
 
 try:
     import seaborn as sns
 except ModuleNotFoundError:
     sns = None
+
+
+
+@functools.lru_cache(maxsize=None)
+def _has_module(name):
+    """可选依赖是否已安装（只查找不导入，交给 pandas 在用到时导入，如 pyarrow/python_calamine）"""
+    return importlib.util.find_spec(name) is not None
+
+
+@functools.lru_cache(maxsize=1)
+def _load_polars():
+    """按需导入 polars（只有大表聚合用到，导入较慢），未安装时返回 None"""
+    try:
+        import polars as pl
+    except ModuleNotFoundError:
+        return None
+    return pl
+
+
+@functools.lru_cache(maxsize=1)
+def _load_numba():
+    """按需导入 numba（导入会带入 LLVM，较慢），未安装时返回 None"""
+    try:
+        import numba
+    except ModuleNotFoundError:
+        return None
+    return numba
+
+# 行数达到该阈值才走 Polars 聚合，小表的转换开销大于收益
+_POLARS_MIN_ROWS = 200_000
+# 行数达到该阈值才用线程池并行执行相互独立的聚合
+_PARALLEL_MIN_ROWS = 100_000
+# 预处理后转为分类类型的常用分组键
+_CATEGORY_KEY_COLUMNS = (
+    '品牌名称', '城市', '渠道', '目录名称', '产品大类', '注册证产品名称',
+    '医院名称', '医疗机构名称', '客户名称', '客户', '机构名称', '机构', '门店名称', '门店',
+)
+# 字体与绘图样式是进程级全局状态，只需配置一次
+_STYLE_INITIALIZED = False
+# pandas 2.x 起 to_datetime 支持 format='ISO8601' 快速解析
+_HAS_ISO8601_FORMAT = int(pd.__version__.split('.')[0]) >= 2
+# 日期列探测的抽样行数
+_DATETIME_SAMPLE_ROWS = 1000
+
+
+def _concentration_kernel(sums_desc):
+    """
+    集中度统计内核（输入为降序排列的实体总量）
+
+    第一遍求总量；第二遍同时求累计覆盖位置与离差平方和；第三遍统计离群。
+    返回 (总量, 覆盖80位置, 覆盖90位置, 均值, 标准差, 低值离群数, 高值离群数)
+    """
+    n = sums_desc.shape[0]
+    total = 0.0
+    for i in range(n):
+        total += sums_desc[i]
+    mean = total / n
+
+    pos_80 = n - 1
+    pos_90 = n - 1
+    found_80 = False
+    found_90 = False
+    cum = 0.0
+    m2 = 0.0
+    for i in range(n):
+        v = sums_desc[i]
+        cum += v
+        if not found_80 and cum / total >= 0.8:
+            pos_80 = i
+            found_80 = True
+        if not found_90 and cum / total >= 0.9:
+            pos_90 = i
+            found_90 = True
+        m2 += (v - mean) * (v - mean)
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+
+    low = mean - 1.5 * std
+    high = mean + 1.5 * std
+    low_count = 0
+    high_count = 0
+    for i in range(n):
+        if sums_desc[i] < low:
+            low_count += 1
+        elif sums_desc[i] > high:
+            high_count += 1
+    return total, pos_80, pos_90, mean, std, low_count, high_count
+
+
+def _concentration_stats_numpy(sums_desc):
+    """集中度统计的 numpy 实现（未安装 numba 时使用，返回值同 _concentration_kernel）"""
+    n = len(sums_desc)
+    total = sums_desc.sum()
+    cumsum = np.cumsum(sums_desc)
+    pos_80, pos_90 = np.searchsorted(cumsum / total, [0.8, 0.9], side='left')
+    mean = sums_desc.mean()
+    std = sums_desc.std(ddof=1) if n > 1 else np.nan
+    low = mean - 1.5 * std
+    high = mean + 1.5 * std
+    return (total, min(pos_80, n - 1), min(pos_90, n - 1), mean, std,
+            int((sums_desc < low).sum()), int((sums_desc > high).sum()))
+
+
+def _cumshare_head_kernel(values_desc, total, threshold, limit):
+    """
+    累计占比头部内核（输入为降序排列的实体总量）
+
+    单次前向扫描，返回累计占比不超过 threshold 的前 limit 个位置
+    """
+    n = values_desc.shape[0]
+    out = np.empty(min(n, limit), dtype=np.int64)
+    m = 0
+    cum = 0.0
+    for i in range(n):
+        if m >= limit:
+            break
+        cum += values_desc[i]
+        if cum / total <= threshold:
+            out[m] = i
+            m += 1
+    return out[:m]
+
+
+def _cumshare_head_numpy(values_desc, total, threshold, limit):
+    """累计占比头部的 numpy 实现（未安装 numba 时使用，返回值同 _cumshare_head_kernel）"""
+    return np.flatnonzero(np.cumsum(values_desc) / total <= threshold)[:limit]
+
+
+def _masked_group_sums_kernel(codes, values, mask, n_groups):
+    """
+    分组求和内核：单遍扫描同时累加组总量与掩码命中部分
+
+    codes < 0 的行跳过，NaN 指标按 0 计。返回 (组总量, 命中量, 组内行数)
+    """
+    totals = np.zeros(n_groups)
+    hits = np.zeros(n_groups)
+    counts = np.zeros(n_groups, dtype=np.int64)
+    for i in range(codes.shape[0]):
+        c = codes[i]
+        if c < 0:
+            continue
+        counts[c] += 1
+        v = values[i]
+        if v != v:
+            continue
+        totals[c] += v
+        if mask[i]:
+            hits[c] += v
+    return totals, hits, counts
+
+
+def _masked_group_sums_numpy(codes, values, mask, n_groups):
+    """分组求和的 numpy 实现（未安装 numba 时使用，返回值同 _masked_group_sums_kernel）"""
+    valid = codes >= 0
+    codes = codes[valid]
+    values = np.nan_to_num(values[valid], nan=0.0)
+    totals = np.bincount(codes, weights=values, minlength=n_groups)
+    hits = np.bincount(codes, weights=np.where(mask[valid], values, 0.0), minlength=n_groups)
+    return totals, hits, np.bincount(codes, minlength=n_groups)
+
+
+def _strip_strings(series):
+    """逐元素转 str 后去首尾空白（逐个字符串处理；numpy 定长字符串数组会按最长一格给每格分配内存）"""
+    return series.astype(str).str.strip()
+
+
+def _to_numeric(series, fill_value=None):
+    """转为数值列：已是数值 dtype 时直接复用，其余才走 pd.to_numeric 解析；可选填充缺失值"""
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors='coerce')
+    if fill_value is not None and series.hasnans:
+        series = series.fillna(fill_value)
+    return series
+
+
+def _extreme_index(values, largest=True):
+    """最大（或最小）值所在行的索引，NaN 不参与比较；全为 NaN 时取首行（与排序后取首行一致）"""
+    if not values.notna().any():
+        return values.index[0]
+    return values.idxmax() if largest else values.idxmin()
+
+
+def _source_dtypes_and_memory(df):
+    """各列类型与内存占用（字节），预处理中转为分类类型的列按原 object 列报告"""
+    dtypes = df.dtypes.copy()
+    memory = df.memory_usage(deep=True, index=False)
+    if df.columns.is_unique:
+        for col in df.attrs.get('_categorized_columns', ()):
+            if col in dtypes.index and isinstance(dtypes[col], pd.CategoricalDtype):
+                dtypes[col] = np.dtype(object)
+                memory[col] = df[col].astype(object).memory_usage(deep=True, index=False)
+    return dtypes, memory
+
+
+def _decategorize(frame):
+    """结果表中的分类列还原为类别本身的类型（分类类型只用于加速分组）"""
+    for col in frame.columns:
+        dtype = frame[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype(dtype.categories.dtype)
+    return frame
+
+
+@functools.lru_cache(maxsize=None)
+def _kernel(kernel, fallback):
+    """首次用到时取内核实现：安装了 numba 时编译 kernel（cache=True 让编译结果跨进程复用），否则用 fallback"""
+    numba = _load_numba()
+    if numba is None:
+        return fallback
+    return numba.njit(cache=True)(kernel)
+
+
+def _concentration_stats(sums_desc):
+    return _kernel(_concentration_kernel, _concentration_stats_numpy)(sums_desc)
+
+
+def _cumshare_head(values_desc, total, threshold, limit):
+    return _kernel(_cumshare_head_kernel, _cumshare_head_numpy)(values_desc, total, threshold, limit)
+
+
+def _masked_group_sums(codes, values, mask, n_groups):
+    return _kernel(_masked_group_sums_kernel, _masked_group_sums_numpy)(codes, values, mask, n_groups)
+
 
 class DataAnalyzer:
     """数据分析器类"""
 
     def __init__(self):
-        self.setup_chinese_font()
-        self.setup_plot_style()
+        global _STYLE_INITIALIZED
+        # 重复构造时跳过字体扫描与 rcParams 写入
+        if not _STYLE_INITIALIZED:
+            self.setup_chinese_font()
+            self.setup_plot_style()
+            _STYLE_INITIALIZED = True
 
     def preprocess_data(self, df):
         """
@@ -31,21 +261,23 @@ class DataAnalyzer:
         - 常见别名标准化：品牌/企业、城市、产品大类
         - 关键数值列尝试转为数值型，便于自动识别核心指标
         """
-        df = df.copy()
+        # 浅拷贝即可：下面只整列替换/新增，不会原地改写原始数据
+        df = df.copy(deep=False)
         df.columns = [str(c).strip() for c in df.columns]
+        original_cols = set(df.columns)
 
         # 统一品牌/企业 -> 品牌名称
         if '品牌名称' not in df.columns:
             for cand in ['申报企业名称', '申报企业', '企业', '厂家', '生产企业', '企业名称', '品牌']:
                 if cand in df.columns:
-                    df['品牌名称'] = df[cand].astype(str).str.strip()
+                    df['品牌名称'] = _strip_strings(df[cand])
                     break
 
         # 注册证产品名称别名
         if '注册证产品名称' not in df.columns:
             for cand in ['产品名称', '注册证名称', '产品']:
                 if cand in df.columns:
-                    df['注册证产品名称'] = df[cand].astype(str).str.strip()
+                    df['注册证产品名称'] = _strip_strings(df[cand])
                     break
 
         # 统一城市
@@ -55,14 +287,14 @@ class DataAnalyzer:
                     if cand == '地区名称':
                         df['城市'] = df[cand].astype(str).str.split('>').str[1].fillna(df[cand].astype(str)).str.strip()
                     else:
-                        df['城市'] = df[cand].astype(str).str.strip()
+                        df['城市'] = _strip_strings(df[cand])
                     break
 
         # 统一渠道
         if '渠道' not in df.columns:
             for cand in ['渠道名称', '销售渠道', '渠道类型']:
                 if cand in df.columns:
-                    df['渠道'] = df[cand].astype(str).str.strip()
+                    df['渠道'] = _strip_strings(df[cand])
                     break
 
         # 产品大类派生自目录名称
@@ -72,15 +304,27 @@ class DataAnalyzer:
         # 关键数值列尝试转数值
         numeric_hints = ['协议采购量', '采购需求量', '第三年采购需求量', '数量', '总量', '合同量', 'GMV', '金额', '采购量']
         for col in numeric_hints:
-            if col in df.columns:
+            # 已是数值列（如读取时已推断、或重复预处理）无需再解析
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
                 converted = pd.to_numeric(df[col], errors='coerce')
                 # 仅在存在有效数值时覆盖
                 if converted.notna().any():
                     df[col] = converted
 
-        # 去除对象列首尾空格
+        # 去除对象列首尾空格；本次新建的别名列已在上面处理
+        derived = {c for c in ['品牌名称', '注册证产品名称', '城市', '渠道'] if c not in original_cols}
         for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].astype(str).str.strip()
+            if col not in derived:
+                df[col] = _strip_strings(df[col])
+
+        # 反复作为分组键的维度列转为分类类型，后续分组直接使用整数编码而非逐个哈希字符串；
+        # 记下转换过的列，字段概览/体检仍按原 object 类型报告
+        categorized = set(df.attrs.get('_categorized_columns', ()))
+        for col in _CATEGORY_KEY_COLUMNS:
+            if col in df.columns and df[col].dtype == object:
+                df[col] = df[col].astype('category')
+                categorized.add(col)
+        df.attrs = {**df.attrs, '_categorized_columns': tuple(c for c in df.columns if c in categorized)}
 
         return df
 
@@ -91,10 +335,11 @@ class DataAnalyzer:
             "Noto Sans CJK SC", "STHeiti", "Microsoft YaHei", "SimHei", "SimSun"
         ]
 
+        # font.family 只认完整字体名，精确集合查找即可，无需逐个子串扫描
         installed = {f.name for f in font_manager.fontManager.ttflist}
 
         for font_name in candidates:
-            if any(font_name in name for name in installed):
+            if font_name in installed:
                 plt.rcParams['font.family'] = font_name
                 break
 
@@ -188,8 +433,100 @@ class DataAnalyzer:
             '门店': '门店',
         }
         return label_map.get(entity_col, '重点实体')
+
+    def _to_polars(self, df, columns):
+        """大表时将聚合所需列一次性转为 Polars DataFrame，否则返回 None"""
+        if len(df) < _POLARS_MIN_ROWS:
+            return None
+        pl = _load_polars()
+        if pl is None:
+            return None
+        columns = list(dict.fromkeys(c for c in columns if c and c in df.columns))
+        try:
+            # 分类列转回字符串，保证按键排序为字典序且结果表不带分类类型
+            return pl.from_pandas(df[columns], rechunk=True).with_columns(pl.col(pl.Categorical).cast(pl.Utf8))
+        except Exception:
+            return None
+
+    def _sum_by_many(self, df, jobs, metric_col, pl_df=None):
+        """
+        批量执行相互独立的 _sum_by，jobs 为 {名称: 分组键}，返回 {名称: 结果}
+
+        大表时用线程池并行，factorize/bincount 与 Polars 聚合大部分时间在 C 层执行。
+        """
+        if len(jobs) < 2 or len(df) < _PARALLEL_MIN_ROWS:
+            return {name: self._sum_by(df, keys, metric_col, pl_df=pl_df) for name, keys in jobs.items()}
+        with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+            futures = {
+                name: pool.submit(self._sum_by, df, keys, metric_col, pl_df)
+                for name, keys in jobs.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _sum_by(self, df, keys, metric_col, pl_df=None):
+        """
+        按一个或多个键求和，结果等价于 df.groupby(keys, as_index=False)[metric_col].sum()
+
+        每个键列只 factorize 一次，组合编码后用 bincount 单遍累加；
+        键缺失的行剔除，结果按键升序排列，整数指标保持原 dtype。
+        传入 pl_df（见 _to_polars）时改由 Polars 并行聚合，边界处转回 pandas。
+        """
+        if isinstance(keys, str):
+            keys = [keys]
+        metric = df[metric_col]
+        if pl_df is not None and all(k in pl_df.columns for k in keys + [metric_col]):
+            out = (
+                pl_df.lazy()
+                .drop_nulls(keys)
+                .group_by(keys)
+                .agg(_load_polars().col(metric_col).sum())
+                .sort(keys)
+                .collect()
+                .to_pandas()
+            )
+            if pd.api.types.is_numeric_dtype(metric.dtype) and not pd.api.types.is_bool_dtype(metric.dtype):
+                out[metric_col] = out[metric_col].astype(metric.dtype)
+            return out
+        values = metric.to_numpy(dtype=np.float64, na_value=np.nan)
+
+        valid = np.ones(len(df), dtype=bool)
+        key_codes, key_uniques = [], []
+        for key in keys:
+            codes, uniques = pd.factorize(df[key], sort=True)
+            valid &= codes >= 0
+            key_codes.append(codes)
+            key_uniques.append(uniques)
+        shape = tuple(len(u) for u in key_uniques)
+
+        if not valid.any():
+            present = np.empty(0, dtype=np.int64)
+            sums = np.empty(0, dtype=np.float64)
+        else:
+            group_id = np.ravel_multi_index([c[valid] for c in key_codes], shape)
+            values = np.nan_to_num(values[valid], copy=False, nan=0.0)
+            n_groups = int(np.prod(shape, dtype=np.float64))
+            if n_groups <= max(4 * len(group_id), 1 << 16):
+                counts = np.bincount(group_id, minlength=n_groups)
+                present = np.flatnonzero(counts)
+                sums = np.bincount(group_id, weights=values, minlength=n_groups)[present]
+            else:
+                present, inverse = np.unique(group_id, return_inverse=True)
+                sums = np.bincount(inverse.ravel(), weights=values, minlength=len(present))
+
+        out = {}
+        for key, uniques, codes in zip(keys, key_uniques, np.unravel_index(present, shape)):
+            values = uniques.take(codes)
+            # 分类键只用于加速分组，结果表还原为类别本身的类型
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype(values.dtype.categories.dtype)
+            out[key] = values
+        if pd.api.types.is_numeric_dtype(metric.dtype) and not pd.api.types.is_bool_dtype(metric.dtype):
+            out[metric_col] = pd.Series(sums).astype(metric.dtype)
+        else:
+            out[metric_col] = sums
+        return pd.DataFrame(out)
 
-    def analyze_concentration(self, df, entity_col, metric_col):
+    def analyze_concentration(self, df, entity_col, metric_col, entity_sums=None):
         """
         按核心实体维度分析集中度与头部/长尾结构
 
@@ -197,6 +534,7 @@ class DataAnalyzer:
             df: 数据
             entity_col: 核心实体列（如医院/客户/渠道等）
             metric_col: 核心指标列（如总约定量/GMV等）
+            entity_sums: 已按实体聚合好的总量（可选，传入时不再扫描 df）
 
         Returns:
             dict 或 None
@@ -206,47 +544,41 @@ class DataAnalyzer:
         if entity_col not in df.columns or metric_col not in df.columns:
             return None
 
-        series = df.groupby(entity_col)[metric_col].sum().sort_values(ascending=False)
-        series = series[series > 0]
-        if series.empty:
+        if entity_sums is not None:
+            sums = np.asarray(entity_sums, dtype=np.float64)
+        else:
+            # factorize + bincount 按实体求和（缺失实体不计入，与 groupby 一致）
+            codes, uniques = pd.factorize(df[entity_col])
+            values = _to_numeric(df[metric_col]).to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = (codes >= 0) & ~np.isnan(values)
+            sums = np.bincount(codes[valid], weights=values[valid], minlength=len(uniques))
+        sums = sums[sums > 0]
+        if sums.size == 0:
             return None
+        sums = sums[np.argsort(-sums, kind='stable')]
 
-        total = series.sum()
-        n_entities = len(series)
-        median = float(series.median())
-        max_v = float(series.iloc[0])
+        total, pos_80, pos_90, mean_v, std_v, low_outliers, high_outliers = _concentration_stats(sums)
+        total = float(total)
+        n_entities = len(sums)
+        median = float(np.median(sums))
+        max_v = float(sums[0])
         max_to_median = max_v / median if median > 0 else None
 
-        def share(k):
-            if n_entities == 0:
-                return 0
-            return float(series.iloc[:min(k, n_entities)].sum() / total * 100)
-
-        top1_share = share(1)
-        top3_share = share(3)
-        top5_share = share(5)
-
-        # 覆盖80%/90%所需实体数
-        cumsum = series.cumsum()
-        # 覆盖80%/90%所需实体数（按位置）
-        need_80_count = n_entities
-        need_90_count = n_entities
-        frac = cumsum / total
-        if (frac >= 0.8).any():
-            # idxmax 返回的是实体标签，这里用位置索引
-            pos_80 = (frac >= 0.8).to_numpy().argmax()
-            need_80_count = int(pos_80 + 1)
-        if (frac >= 0.9).any():
-            pos_90 = (frac >= 0.9).to_numpy().argmax()
-            need_90_count = int(pos_90 + 1)
+        top1_share = float(sums[:1].sum() / total * 100)
+        top3_share = float(sums[:3].sum() / total * 100)
+        top5_share = float(sums[:5].sum() / total * 100)
+
+        # 覆盖80%/90%所需实体数（按位置，累计占比首次达到阈值处）
+        need_80_count = int(pos_80 + 1)
+        need_90_count = int(pos_90 + 1)
 
         # 使用均值±1.5*标准差识别离群
-        mean_v = float(series.mean())
-        std_v = float(series.std())
+        mean_v = float(mean_v)
+        std_v = float(std_v)
         low_thresh = mean_v - 1.5 * std_v
         high_thresh = mean_v + 1.5 * std_v
-        low_outliers = int((series < low_thresh).sum())
-        high_outliers = int((series > high_thresh).sum())
+        low_outliers = int(low_outliers)
+        high_outliers = int(high_outliers)
 
         return {
             '实体数': n_entities,
@@ -271,12 +603,17 @@ class DataAnalyzer:
         """
         将数值序列归一化到 0-100 分。
         """
-        s = pd.to_numeric(series, errors='coerce').fillna(0.0)
-        min_v = float(s.min())
-        max_v = float(s.max())
-        if max_v - min_v < 1e-9:
-            return pd.Series(np.full(len(s), 50.0), index=s.index)
-        return ((s - min_v) / (max_v - min_v) * 100.0).clip(0.0, 100.0)
+        series = _to_numeric(series)
+        a = series.to_numpy(dtype=np.float64, na_value=0.0)
+        if a.size == 0:
+            return pd.Series(a, index=series.index)
+        min_v = a.min()
+        span = a.max() - min_v
+        if span < 1e-9:
+            return pd.Series(np.full(a.shape, 50.0), index=series.index)
+        out = (a - min_v) / span * 100.0
+        np.clip(out, 0.0, 100.0, out=out)
+        return pd.Series(out, index=series.index, copy=False)
 
     def build_opportunity_priority(
         self,
@@ -310,8 +647,8 @@ class DataAnalyzer:
         if work.empty:
             return pd.DataFrame()
 
-        work[total_col] = pd.to_numeric(work[total_col], errors='coerce').fillna(0.0)
-        work[share_col] = pd.to_numeric(work[share_col], errors='coerce').fillna(0.0).clip(0.0, 100.0)
+        work[total_col] = _to_numeric(work[total_col], fill_value=0.0)
+        work[share_col] = _to_numeric(work[share_col], fill_value=0.0).clip(0.0, 100.0)
         work = work[work[total_col] > 0].copy()
         if work.empty:
             return pd.DataFrame()
@@ -322,7 +659,7 @@ class DataAnalyzer:
 
         # 可行性：优先参考已有基础（目标品牌量）；无则用份额缺口替代
         if target_volume_col and target_volume_col in work.columns:
-            work[target_volume_col] = pd.to_numeric(work[target_volume_col], errors='coerce').fillna(0.0)
+            work[target_volume_col] = _to_numeric(work[target_volume_col], fill_value=0.0)
             work['_feas_raw'] = np.log1p(work[target_volume_col])
         else:
             work['_feas_raw'] = gap_ratio
@@ -335,39 +672,33 @@ class DataAnalyzer:
         invest_score = self._normalize_score(work['_invest_raw'])
         work['投入效率分'] = (100.0 - invest_score).clip(0.0, 100.0)
 
-        # 立方均值近似“影响 × 可行性 × 投入效率”后的可读分值
-        product = (work['影响分'] * work['可行性分'] * work['投入效率分']).clip(lower=0.0)
-        work['综合优先级分'] = np.power(product, 1.0 / 3.0)
-
-        def _priority_level(score):
-            if score >= 70:
-                return '高优先'
-            if score >= 55:
-                return '中高优先'
-            if score >= 40:
-                return '中优先'
-            return '观察'
-
-        def _reason(row):
-            i = row['影响分']
-            f = row['可行性分']
-            e = row['投入效率分']
-            if i >= 70 and f >= 60:
-                base = '潜在增量大且已有基础，适合优先推进'
-            elif i >= 70 and f < 60:
-                base = '潜在增量大但基础较弱，建议先小范围试点'
-            elif i < 70 and f >= 60:
-                base = '增量中等但落地快，可作为稳健补充'
-            else:
-                base = '增量与可行性一般，建议低成本跟踪'
-            if e < 40:
-                return base + '，预计投入强度较高'
-            if e >= 70:
-                return base + '，投入效率较好'
-            return base
-
-        work['优先级'] = work['综合优先级分'].map(_priority_level)
-        work['优先级理由'] = work.apply(_reason, axis=1)
+        # 立方均值近似“影响 × 可行性 × 投入效率”后的可读分值（ndarray 上原地求积与立方根）
+        i = work['影响分'].to_numpy(dtype=np.float64)
+        f = work['可行性分'].to_numpy(dtype=np.float64)
+        e = work['投入效率分'].to_numpy(dtype=np.float64)
+        product = i * f
+        np.multiply(product, e, out=product)
+        np.maximum(product, 0.0, out=product)
+        np.cbrt(product, out=product)
+        work['综合优先级分'] = product
+
+        # 优先级与理由：按阈值向量化取值（NaN 比较均为 False，落入默认档）
+        score = product
+        work['优先级'] = np.select(
+            [score >= 70, score >= 55, score >= 40],
+            ['高优先', '中高优先', '中优先'],
+            default='观察',
+        ).astype(object)
+
+        base = np.select(
+            [(i >= 70) & (f >= 60), (i >= 70) & (f < 60), (i < 70) & (f >= 60)],
+            ['潜在增量大且已有基础，适合优先推进',
+             '潜在增量大但基础较弱，建议先小范围试点',
+             '增量中等但落地快，可作为稳健补充'],
+            default='增量与可行性一般，建议低成本跟踪',
+        )
+        suffix = np.where(e < 40, '，预计投入强度较高', np.where(e >= 70, '，投入效率较好', ''))
+        work['优先级理由'] = np.char.add(base, suffix).astype(object)
 
         sort_cols = ['综合优先级分', '影响分', '可行性分']
         work = work.sort_values(sort_cols, ascending=False).reset_index(drop=True)
@@ -382,21 +713,28 @@ class DataAnalyzer:
 
     def generate_field_overview(self, df):
         """生成字段画像"""
-        overview = []
-        memory_usage = df.memory_usage(deep=True)
-        for col in df.columns:
-            series = df[col]
-            sample = series.dropna()
-            overview.append({
-                '字段': col,
-                '类型': str(series.dtype),
-                '缺失率(%)': round(series.isna().mean() * 100, 2),
-                '唯一值数': int(series.nunique(dropna=True)),
-                '非空数量': int(series.count()),
-                '内存占用(MB)': round(memory_usage[col] / 1024**2, 3),
-                '示例值': str(sample.iloc[0]) if not sample.empty else ''
-            })
-        return pd.DataFrame(overview)
+        # 各项统计整表一次算出，避免逐列重复扫描
+        notna = df.notna().to_numpy()
+        n_rows = len(df)
+        non_null = notna.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            missing_pct = (n_rows - non_null) / n_rows * 100
+        first_valid = notna.argmax(axis=0) if n_rows else np.zeros(len(df.columns), dtype=np.int64)
+        dtypes, memory = _source_dtypes_and_memory(df)
+        memory_mb = memory.to_numpy() / 1024**2
+        samples = [
+            str(df.iat[first_valid[j], j]) if non_null[j] else ''
+            for j in range(len(df.columns))
+        ]
+        return pd.DataFrame({
+            '字段': df.columns,
+            '类型': dtypes.astype(str).to_numpy(),
+            '缺失率(%)': np.round(missing_pct, 2),
+            '唯一值数': df.nunique(dropna=True).to_numpy().astype(int),
+            '非空数量': non_null.astype(int),
+            '内存占用(MB)': np.round(memory_mb, 3),
+            '示例值': samples,
+        })
 
     def summarize_numeric_columns(self, df):
         """生成数值字段统计"""
@@ -449,16 +787,21 @@ class DataAnalyzer:
         numeric_cols = self.get_numeric_columns(df)
         if len(numeric_cols) < 2:
             return None
-        corr = df[numeric_cols].corr()
-        # 如果全部为NaN或仅对角线为1，视为无有效相关性
-        if corr.replace(1.0, 0).abs().sum().sum() == 0:
-            return None
-        if corr.isnull().all().all():
-            return None
-        # 若最高相关系数低于0.3，视为无实质相关性
-        corr_abs = corr.abs().copy()
-        corr_abs.values[[range(len(corr_abs))]*2] = 0
-        if corr_abs.max().max() < 0.3:
+        # 无缺失值时直接在连续 float64 数组上用 np.corrcoef（BLAS 矩阵乘）；有缺失值仍走 pandas 的逐对剔除口径
+        values = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        if len(values) >= 2 and not np.isnan(values).any():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                arr = np.corrcoef(values, rowvar=False)
+            # 浮点舍入会让对角线略小于 1，按 pandas 口径写回 1.0（常数列保持 NaN）
+            np.fill_diagonal(arr, np.where(np.isnan(np.diagonal(arr)), np.nan, 1.0))
+            corr = pd.DataFrame(arr, index=numeric_cols, columns=numeric_cols)
+        else:
+            corr = df[numeric_cols].corr()
+        # 仅看非对角线元素：全为NaN/0（仅对角线为1）或最高相关系数低于0.3，视为无实质相关性
+        values = corr.to_numpy()
+        off_diag = np.abs(values[~np.eye(len(values), dtype=bool)])
+        off_diag = off_diag[~np.isnan(off_diag)]
+        if off_diag.size == 0 or off_diag.max() < 0.3:
             return None
         return corr
 
@@ -468,7 +811,7 @@ class DataAnalyzer:
         date_name_hints = ('日期', '时间', '月份', '月', '周', '季度', 'date', 'time', 'day')
         for col in df.columns:
             series = df[col]
-            if np.issubdtype(series.dtype, np.datetime64):
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
                 datetime_cols.append(col)
                 continue
             if series.dtype == object:
@@ -483,8 +826,17 @@ class DataAnalyzer:
                 ).mean() > 0.4
                 if not any(hint in col_name for hint in date_name_hints) and not looks_like_date:
                     continue
-                parsed = pd.to_datetime(series, errors='coerce')
+                # 先解析抽样，成功率不足时不做整列解析
+                probe = series.dropna().head(_DATETIME_SAMPLE_ROWS)
+                if pd.to_datetime(probe, errors='coerce').notna().mean() <= 0.7:
+                    continue
+                # 抽样全部为 ISO 日期时走 ISO8601 快速路径
+                if _HAS_ISO8601_FORMAT and probe.astype(str).str.match(r'\d{4}-\d{2}-\d{2}').all():
+                    parsed = pd.to_datetime(series, errors='coerce', format='ISO8601')
+                else:
+                    parsed = pd.to_datetime(series, errors='coerce')
                 if parsed.notna().mean() > 0.7:
+                    # 原地替换为 datetime 列，后续 analyze_time_series 无需再解析
                     df[col] = parsed
                     datetime_cols.append(col)
         return datetime_cols
@@ -499,15 +851,17 @@ class DataAnalyzer:
             return None
 
         time_col = candidate_cols[0]
-        data = df.copy()
-        data[time_col] = pd.to_datetime(data[time_col], errors='coerce')
+        # 时间列转换后不再是数值列，故先排除；之后只取用到的两列，避免复制整表
+        numeric_cols = [c for c in self.get_numeric_columns(df) if c != time_col]
+        metric_col = value_column if value_column in numeric_cols else (numeric_cols[0] if numeric_cols else None)
+
+        data = df[[time_col, metric_col] if metric_col else [time_col]]
+        if not pd.api.types.is_datetime64_any_dtype(data[time_col]):
+            data = data.assign(**{time_col: pd.to_datetime(data[time_col], errors='coerce')})
         data = data.dropna(subset=[time_col])
         if data.empty:
             return None
 
-        numeric_cols = self.get_numeric_columns(data)
-        metric_col = value_column if value_column in numeric_cols else (numeric_cols[0] if numeric_cols else None)
-
         data = data.sort_values(time_col)
         span_days = (data[time_col].max() - data[time_col].min()).days if len(data) > 1 else 0
         if span_days > 730:
@@ -528,21 +882,37 @@ class DataAnalyzer:
 
         return grouped
 
-    def load_data(self, file_path, sheet_name=None):
+    def load_data(self, file_path, sheet_name=None, usecols=None, dtype=None):
         """
         加载数据文件
 
         Args:
             file_path: 文件路径
             sheet_name: Excel工作表名称（可选）
+            usecols: 只读取的列（可选）
+            dtype: 列类型提示（可选）
 
         Returns:
             DataFrame: 加载的数据
         """
         if file_path.endswith('.csv'):
-            return pd.read_csv(file_path, encoding='utf-8-sig')
+            # 安装了 pyarrow 时用多线程解析；遇到其不支持的格式再退回默认引擎
+            if _has_module('pyarrow'):
+                try:
+                    df = pd.read_csv(file_path, encoding='utf-8-sig', engine='pyarrow', usecols=usecols, dtype=dtype)
+                except Exception:
+                    df = None
+                if df is not None:
+                    # pyarrow 以 None 表示文本空值，统一为 NaN 与默认引擎保持一致
+                    obj_cols = df.select_dtypes(include=['object']).columns
+                    if len(obj_cols):
+                        df[obj_cols] = df[obj_cols].where(df[obj_cols].notna(), np.nan)
+                    return df
+            return pd.read_csv(file_path, encoding='utf-8-sig', usecols=usecols, dtype=dtype)
         elif file_path.endswith(('.xlsx', '.xls')):
-            return pd.read_excel(file_path, sheet_name=sheet_name)
+            # calamine（Rust 实现）读取大表明显快于 openpyxl，未安装时使用默认引擎
+            engine = 'calamine' if _has_module('python_calamine') else None
+            return pd.read_excel(file_path, sheet_name=sheet_name, usecols=usecols, dtype=dtype, engine=engine)
         else:
             raise ValueError(f"不支持的文件格式: {file_path}")
 
@@ -556,15 +926,17 @@ class DataAnalyzer:
         Returns:
             dict: 体检报告
         """
+        dtypes, memory = _source_dtypes_and_memory(df)
+        memory_bytes = memory.sum() + df.index.memory_usage(deep=True)
         report = {
             '基本信息': {
                 '记录数': len(df),
                 '字段数': len(df.columns),
-                '内存使用': f"{df.memory_usage(deep=True).sum() / 1024**2:.2f} MB"
+                '内存使用': f"{memory_bytes / 1024**2:.2f} MB"
             },
             '缺失值': df.isnull().sum().to_dict(),
             '重复记录': df.duplicated().sum(),
-            '数据类型': df.dtypes.to_dict(),
+            '数据类型': dtypes.to_dict(),
             '唯一值数量': df.nunique().to_dict()
         }
 
@@ -601,7 +973,7 @@ class DataAnalyzer:
         Returns:
             DataFrame: 包含市场份额的结果
         """
-        result = df.groupby(group_cols)[quantity_col].agg(['sum', 'count']).reset_index()
+        result = _decategorize(df.groupby(group_cols, observed=True)[quantity_col].agg(['sum', 'count']).reset_index())
         result.columns = list(group_cols) + ['总量', '覆盖数']
 
         total = result['总量'].sum()
@@ -626,18 +998,22 @@ class DataAnalyzer:
         Returns:
             DataFrame: 机会城市列表
         """
-        city_stats = df.groupby(city_col).agg({
-            quantity_col: 'sum',
-            company_col: lambda x: (x == company_name).sum()
-        }).reset_index()
-        city_stats.columns = ['城市', '总容量', '目标对象覆盖数']
+        # 目标对象命中标记与命中量作为普通列参与聚合，避免 lambda 走逐组 Python 回调
+        is_target = (df[company_col] == company_name).to_numpy()
+        work = df[[city_col, quantity_col]].assign(
+            _is_target=is_target.astype(np.int64),
+            _target_qty=df[quantity_col].where(is_target, 0),
+        )
+        city_stats = work.groupby(city_col, sort=False, observed=True).agg(
+            总容量=(quantity_col, 'sum'),
+            目标对象覆盖数=('_is_target', 'sum'),
+            目标对象量=('_target_qty', 'sum'),
+        ).reset_index()
+        city_stats = _decategorize(city_stats.rename(columns={city_col: '城市'}))
 
         # 计算目标对象份额
-        company_share = df.groupby([city_col, company_col])[quantity_col].sum().unstack(fill_value=0)
-        if company_name in company_share.columns:
-            city_stats['目标对象份额(%)'] = company_share[company_name] / company_share.sum(axis=1) * 100
-        else:
-            city_stats['目标对象份额(%)'] = 0
+        city_stats['目标对象份额(%)'] = city_stats['目标对象量'] / city_stats['总容量'] * 100
+        city_stats = city_stats.drop(columns='目标对象量')
         city_stats['林华份额'] = city_stats['目标对象份额(%)']
 
         # 识别白区：容量大但份额低的城市
@@ -665,24 +1041,29 @@ class DataAnalyzer:
         Returns:
             DataFrame: 医院机会列表
         """
-        hospital_stats = df.groupby(hospital_col).agg({
-            quantity_col: 'sum',
-            company_col: lambda x: list(x.unique())
-        }).reset_index()
-        hospital_stats.columns = ['重点实体名称', '总容量', '品牌列表']
+        # 单次透视得到 实体 x 品牌 矩阵，总量、品牌数、目标份额均由其派生；
+        # observed=True 避免分类键的未出现类别把矩阵撑大
+        hospital_share = df.pivot_table(
+            index=hospital_col, columns=company_col, values=quantity_col,
+            aggfunc='sum', fill_value=0, observed=True, sort=False,
+        )
+        total = hospital_share.sum(axis=1)
+        hospital_stats = _decategorize(pd.DataFrame({
+            '重点实体名称': hospital_share.index,
+            '总容量': total.to_numpy(),
+            '品牌数': (hospital_share > 0).sum(axis=1).to_numpy(),
+        }))
 
         # 计算每个重点实体的目标对象份额
-        hospital_share = df.groupby([hospital_col, company_col])[quantity_col].sum().unstack(fill_value=0)
         if company_name in hospital_share.columns:
-            hospital_stats['目标对象份额(%)'] = hospital_share[company_name] / hospital_share.sum(axis=1) * 100
+            hospital_stats['目标对象份额(%)'] = (hospital_share[company_name] / total * 100).to_numpy()
         else:
             hospital_stats['目标对象份额(%)'] = 0
         hospital_stats['林华份额'] = hospital_stats['目标对象份额(%)']
         hospital_stats['医院名称'] = hospital_stats['重点实体名称']
 
-        hospital_stats['覆盖状态'] = hospital_stats['目标对象份额(%)'].apply(
-            lambda x: '未覆盖' if x == 0 else '低份额' if x < 10 else '已覆盖'
-        )
+        share = hospital_stats['目标对象份额(%)'].to_numpy(dtype=np.float64)
+        hospital_stats['覆盖状态'] = np.select([share == 0, share < 10], ['未覆盖', '低份额'], default='已覆盖').astype(object)
 
         # 机会重点实体：高容量但低份额或未覆盖
         opportunities = hospital_stats[
@@ -707,12 +1088,11 @@ class DataAnalyzer:
         Returns:
             DataFrame: 产品结构分析
         """
-        # 判断安全型
-        df['产品类型'] = df[structure_col].apply(
-            lambda x: '安全型' if pd.notna(x) and '安全' in str(x) else '普通型'
-        )
+        # 判断安全型（整列子串匹配，缺失值视为普通型）
+        is_safe = df[structure_col].astype('string').str.contains('安全', na=False, regex=False)
+        df['产品类型'] = np.where(is_safe.to_numpy(dtype=bool), '安全型', '普通型').astype(object)
 
-        structure_analysis = df.groupby(['产品类型', company_col])[quantity_col].sum().unstack(fill_value=0)
+        structure_analysis = df.groupby(['产品类型', company_col], observed=True)[quantity_col].sum().unstack(fill_value=0)
         structure_pct = structure_analysis.div(structure_analysis.sum(axis=1), axis=0) * 100
 
         return structure_pct.reset_index()
@@ -758,22 +1138,50 @@ class DataAnalyzer:
             core_metric = numeric_cols[0]
         results['核心指标列'] = core_metric
 
-        # 数据层级与可用维度
-        has_product = '注册证产品名称' in df.columns and df['注册证产品名称'].nunique(dropna=True) > 1
-        has_catalog = '目录名称' in df.columns and df['目录名称'].nunique(dropna=True) > 1
-        has_major = '产品大类' in df.columns and df['产品大类'].nunique(dropna=True) > 1
-        has_city = '城市' in df.columns and df['城市'].nunique(dropna=True) > 1
+        # 数据层级与可用维度：列集合与各维度字段一次确定，后续分支直接复用
+        columns = set(df.columns)
+        has_city = '城市' in columns and df['城市'].nunique(dropna=True) > 1
         channel_col = self.detect_channel_column(df)
-        hosp_col = None
-        for cand in ['医院名称', '医疗机构名称', '客户名称', '客户', '机构名称', '机构', '门店名称', '门店']:
-            if cand in df.columns:
-                hosp_col = cand
-                break
-
-        # 通用口径聚合（按市场视角）
-        if core_dim and core_metric and core_dim in df.columns and core_metric in df.columns:
+        hosp_col = self.detect_focus_entity_column(df)
+        # 核心维度/重点实体可能不在预设分组键里（如自定义核心维度），同样只编码一次供后续分组复用
+        for col in (core_dim, hosp_col):
+            if col and col in columns and df[col].dtype == object:
+                df[col] = df[col].astype('category')
+
+        # 通用口径聚合（按市场视角）；大表时聚合列只转换一次给 Polars
+        pl_df = None
+        sums = {}
+        if core_metric and core_metric in columns:
+            pl_df = self._to_polars(df, [
+                core_metric, core_dim, '城市', channel_col, '目录名称', '产品大类',
+                hosp_col, '注册证产品名称', '品牌名称',
+            ])
+            # 相互独立的边际/交叉聚合统一提交，大表时并行执行
+            sum_jobs = {}
+            has_core = bool(core_dim) and core_dim in columns
+            if has_core:
+                sum_jobs['core'] = core_dim
+            if '城市' in columns:
+                sum_jobs['city'] = '城市'
+                if has_core:
+                    sum_jobs['city_brand'] = ['城市', core_dim]
+            if channel_col:
+                sum_jobs['channel'] = channel_col
+            if '目录名称' in columns:
+                sum_jobs['catalog'] = '目录名称'
+            if '产品大类' in columns:
+                sum_jobs['major'] = '产品大类'
+            if hosp_col:
+                sum_jobs['hosp_top'] = [hosp_col, '城市'] if '城市' in columns else [hosp_col]
+            if '注册证产品名称' in columns:
+                sum_jobs['prod'] = '注册证产品名称'
+                sum_jobs['prod_brand'] = ['品牌名称', '注册证产品名称']
+                if '城市' in columns and has_city:
+                    sum_jobs['prod_city'] = ['城市', '注册证产品名称']
+            sums = self._sum_by_many(df, sum_jobs, core_metric, pl_df=pl_df)
+        if core_dim and core_metric and core_dim in columns and core_metric in columns:
             core_share = (
-                df.groupby(core_dim, as_index=False)[core_metric].sum()
+                sums['core']
                 .sort_values(core_metric, ascending=False)
                 .reset_index(drop=True)
             )
@@ -782,9 +1190,9 @@ class DataAnalyzer:
                 core_share['份额(%)'] = core_share[core_metric] / total_core * 100
             results['核心维度分布'] = core_share
 
-        if '城市' in df.columns and core_metric and core_metric in df.columns:
+        if '城市' in columns and core_metric and core_metric in columns:
             city_share = (
-                df.groupby('城市', as_index=False)[core_metric].sum()
+                sums['city']
                 .sort_values(core_metric, ascending=False)
                 .reset_index(drop=True)
             )
@@ -793,9 +1201,9 @@ class DataAnalyzer:
                 city_share['份额(%)'] = city_share[core_metric] / total_city * 100
             results['城市分布'] = city_share
 
-        if channel_col and core_metric and core_metric in df.columns:
+        if channel_col and core_metric and core_metric in columns:
             channel_share = (
-                df.groupby(channel_col, as_index=False)[core_metric].sum()
+                sums['channel']
                 .sort_values(core_metric, ascending=False)
                 .reset_index(drop=True)
             )
@@ -804,9 +1212,9 @@ class DataAnalyzer:
                 channel_share['份额(%)'] = channel_share[core_metric] / total_channel * 100
             results['渠道分布'] = channel_share
 
-        if '目录名称' in df.columns and core_metric and core_metric in df.columns:
+        if '目录名称' in columns and core_metric and core_metric in columns:
             category_share = (
-                df.groupby('目录名称', as_index=False)[core_metric].sum()
+                sums['catalog']
                 .sort_values(core_metric, ascending=False)
                 .reset_index(drop=True)
             )
@@ -815,9 +1223,9 @@ class DataAnalyzer:
                 category_share['份额(%)'] = category_share[core_metric] / total_cat * 100
             results['目录分布'] = category_share
 
-        if '产品大类' in df.columns and core_metric and core_metric in df.columns:
+        if '产品大类' in columns and core_metric and core_metric in columns:
             major_share = (
-                df.groupby('产品大类', as_index=False)[core_metric].sum()
+                sums['major']
                 .sort_values(core_metric, ascending=False)
                 .reset_index(drop=True)
             )
@@ -827,17 +1235,21 @@ class DataAnalyzer:
             results['大类分布'] = major_share
 
         # 覆盖分析（需核心维度、重点实体字段）
-        if core_dim and core_metric and hosp_col and core_dim in df.columns and core_metric in df.columns:
+        if core_dim and core_metric and hosp_col and core_dim in columns and core_metric in columns:
             entity_label = self.get_entity_label(hosp_col)
-            coverage_df = (
-                df.groupby(core_dim)
+            # 按核心维度分布（已按总量降序）的顺序对齐，分组无需排序，结尾也不必再按总量排序
+            ranked = results['核心维度分布']
+            coverage_df = _decategorize(
+                df.groupby(core_dim, sort=False, observed=True)
                 .agg(
-                    总量=(core_metric, 'sum'),
                     覆盖实体数=(hosp_col, 'nunique'),
-                    城市覆盖数=('城市', 'nunique') if '城市' in df.columns else (core_metric, 'count'),
+                    城市覆盖数=('城市', 'nunique') if '城市' in columns else (core_metric, 'count'),
                 )
+                .reindex(ranked[core_dim].to_numpy())
                 .reset_index()
             )
+            # 总量直接复用核心维度分布的聚合结果，不再对原表重复求和
+            coverage_df.insert(1, '总量', ranked[core_metric].to_numpy())
             coverage_df['单实体均量'] = coverage_df['总量'] / coverage_df['覆盖实体数'].replace(0, np.nan)
             coverage_df['覆盖对象类型'] = entity_label
             # 兼容旧口径，避免外部依赖直接断裂
@@ -846,47 +1258,50 @@ class DataAnalyzer:
             total_cov = coverage_df['总量'].sum()
             if total_cov > 0:
                 coverage_df['份额(%)'] = coverage_df['总量'] / total_cov * 100
-            coverage_df = coverage_df.sort_values('总量', ascending=False).reset_index(drop=True)
             results['覆盖分析'] = coverage_df
 
         # 城市-品牌长表与城市Top3（需城市+核心维度+核心指标）
-        if '城市' in df.columns and core_dim and core_metric and core_dim in df.columns and core_metric in df.columns:
+        if '城市' in columns and core_dim and core_metric and core_dim in columns and core_metric in columns:
             city_brand = (
-                df.groupby(['城市', core_dim], as_index=False)[core_metric].sum()
+                sums['city_brand']
                 .sort_values(['城市', core_metric], ascending=[True, False])
             )
             city_total = (
-                city_brand.groupby('城市', as_index=False)[core_metric].sum()
+                city_brand.groupby('城市', sort=False, as_index=False)[core_metric].sum()
                 .rename(columns={core_metric: '城市总量'})
             )
             city_brand = city_brand.merge(city_total, on='城市', how='left')
             city_brand['份额(%)'] = city_brand[core_metric] / city_brand['城市总量'] * 100
             results['城市品牌分布'] = city_brand
 
-            records = []
-            for city, g in city_brand.groupby('城市'):
-                g2 = g.sort_values(core_metric, ascending=False).reset_index(drop=True)
-                row = {'城市': city, '城市总量': g2['城市总量'].iloc[0]}
-                cr3 = 0.0
-                for i in range(3):
-                    if i < len(g2):
-                        row[f"Top{i+1}_品牌"] = g2.loc[i, core_dim]
-                        row[f"Top{i+1}_数量"] = g2.loc[i, core_metric]
-                        row[f"Top{i+1}_份额(%)"] = g2.loc[i, '份额(%)']
-                        cr3 += g2.loc[i, '份额(%)']
-                    else:
-                        row[f"Top{i+1}_品牌"] = None
-                        row[f"Top{i+1}_数量"] = None
-                        row[f"Top{i+1}_份额(%)"] = None
-                row["CR3(%)"] = cr3
-                records.append(row)
-            results['城市Top3'] = pd.DataFrame(records)
+            # city_brand 已按 城市、数量降序 排好，组内序号 <3 即各城市 Top3，按名次展开成宽表
+            rank = city_brand.groupby('城市', sort=False).cumcount()
+            top3 = city_brand[rank < 3].assign(_rk=rank[rank < 3] + 1)
+            top3_table = pd.DataFrame()
+            if not top3.empty:
+                by_city = top3.groupby('城市', sort=False)
+                cities = by_city['城市总量'].first()
+                top3_table = pd.DataFrame({'城市': cities.index.to_numpy(), '城市总量': cities.to_numpy()})
+                empty = np.full(len(cities), None, dtype=object)
+                # 按名次取行对齐到城市，缺位才引入空值（数量列无缺位时保持整数类型）
+                for i in range(1, 4):
+                    nth = top3[top3['_rk'] == i].set_index('城市').reindex(cities.index)
+                    if nth[core_dim].isna().all():
+                        top3_table[f"Top{i}_品牌"] = empty
+                        top3_table[f"Top{i}_数量"] = empty
+                        top3_table[f"Top{i}_份额(%)"] = empty
+                        continue
+                    brand = nth[core_dim].astype(object)
+                    top3_table[f"Top{i}_品牌"] = brand.where(brand.notna(), None).to_numpy()
+                    top3_table[f"Top{i}_数量"] = nth[core_metric].to_numpy()
+                    top3_table[f"Top{i}_份额(%)"] = nth['份额(%)'].to_numpy()
+                top3_table["CR3(%)"] = by_city['份额(%)'].sum().to_numpy()
+            results['城市Top3'] = top3_table
 
         # 重点实体TOP（医院/客户/机构/门店）
-        hosp_col2 = self.detect_focus_entity_column(df)
-        if hosp_col2 and core_metric and core_metric in df.columns:
+        if hosp_col and core_metric and core_metric in columns:
             hosp_top = (
-                df.groupby([hosp_col2, '城市'] if '城市' in df.columns else [hosp_col2], as_index=False)[core_metric].sum()
+                sums['hosp_top']
                 .sort_values(core_metric, ascending=False)
                 .reset_index(drop=True)
             )
@@ -894,33 +1309,29 @@ class DataAnalyzer:
             results['医院TOP'] = hosp_top
 
         # 产品/注册证名称分布（如有）
-        if '注册证产品名称' in df.columns and core_metric and core_metric in df.columns:
+        if '注册证产品名称' in columns and core_metric and core_metric in columns:
             prod = (
-                df.groupby('注册证产品名称', as_index=False)[core_metric].sum()
+                sums['prod']
                 .sort_values(core_metric, ascending=False)
                 .reset_index(drop=True)
             )
             results['产品分布'] = prod
             # 品牌 x 产品结构
-            prod_brand = (
-                df.groupby(['品牌名称', '注册证产品名称'], as_index=False)[core_metric].sum()
-                .sort_values(['品牌名称', core_metric], ascending=[True, False])
-            )
-            total_pb = prod_brand.groupby('品牌名称')[core_metric].transform('sum')
-            prod_brand['份额(%)'] = prod_brand[core_metric] / total_pb * 100
+            # 份额不依赖行序：先在聚合结果上算份额，最后只排一次序
+            prod_brand = sums['prod_brand']
+            brand_total = prod_brand.groupby('品牌名称', sort=False)[core_metric].sum()
+            prod_brand['份额(%)'] = prod_brand[core_metric].to_numpy() / prod_brand['品牌名称'].map(brand_total).to_numpy() * 100
+            prod_brand.sort_values(['品牌名称', core_metric], ascending=[True, False], inplace=True)
             results['品牌产品分布'] = prod_brand
             # 城市 x 产品（如有城市）
-            if '城市' in df.columns and has_city:
-                prod_city = (
-                    df.groupby(['城市', '注册证产品名称'], as_index=False)[core_metric].sum()
-                    .sort_values(['城市', core_metric], ascending=[True, False])
-                )
-                city_total = prod_city.groupby('城市')[core_metric].transform('sum')
-                prod_city['份额(%)'] = prod_city[core_metric] / city_total * 100
+            if '城市' in columns and has_city:
+                prod_city = sums['prod_city']
+                city_total = prod_city.groupby('城市', sort=False)[core_metric].sum()
+                prod_city['份额(%)'] = prod_city[core_metric].to_numpy() / prod_city['城市'].map(city_total).to_numpy() * 100
+                prod_city.sort_values(['城市', core_metric], ascending=[True, False], inplace=True)
                 results['城市产品分布'] = prod_city
-            # 品牌内部产品Top
-            prod_brand_top = prod_brand.sort_values(['品牌名称', core_metric], ascending=[True, False])
-            results['品牌产品Top'] = prod_brand_top
+            # 品牌内部产品Top：prod_brand 已按 品牌、数量降序 排好，直接复用
+            results['品牌产品Top'] = prod_brand
 
         categorical_summary = self.summarize_categorical_columns(df, core_dim=core_dim)
         if not categorical_summary.empty:
@@ -949,13 +1360,16 @@ class DataAnalyzer:
         brand_col = self.detect_brand_column(df, preferred=core_dim)
         if brand_col and {'类别名称', core_metric}.issubset(df.columns):
             results['产品结构'] = self.analyze_product_structure(
-                df.copy(),
+                df.copy(deep=False),
                 quantity_col=core_metric,
                 company_col=brand_col,
             )
 
         # 集中度分析（基于核心实体维度和核心指标列）
-        concentration = self.analyze_concentration(df, core_dim, core_metric)
+        concentration = self.analyze_concentration(
+            df, core_dim, core_metric,
+            entity_sums=sums['core'][core_metric].to_numpy(dtype=np.float64, na_value=np.nan) if 'core' in sums else None,
+        )
         if concentration is not None:
             results['集中度分析'] = concentration
 
@@ -963,37 +1377,42 @@ class DataAnalyzer:
         head_names = []
         tail_names = []
         def _clean_entity_names(values):
-            cleaned = []
-            for v in values:
-                if pd.isna(v):
-                    continue
-                s = str(v).strip()
-                if not s:
-                    continue
-                if s.lower() in {"nan", "none", "null", "na", "n/a"}:
-                    continue
-                cleaned.append(s)
-            return cleaned
-        if core_dim and core_metric and core_dim in df.columns and core_metric in df.columns:
-            group = df.groupby(core_dim)[core_metric].sum().sort_values(ascending=False)
-            total = group.sum()
+            # 整列去空值、去首尾空白，再剔除空串与各类缺失值写法
+            names = pd.Series(values, dtype=object).dropna().astype(str).str.strip()
+            names = names[(names != '') & ~names.str.lower().isin({"nan", "none", "null", "na", "n/a"})]
+            return names.tolist()
+        if core_dim and core_metric and core_dim in columns and core_metric in columns:
+            # 复用已按总量降序的核心维度分布，不再重复分组与排序
+            ranked = results['核心维度分布']
+            values = ranked[core_metric].to_numpy(dtype=np.float64)
+            total = values.sum()
             if total > 0:
-                frac = group.cumsum() / total
-                head_80 = list(frac[frac <= 0.8].index)
-                if not head_80 and len(group) > 0:
-                    head_80 = [group.index[0]]
-                head_names = _clean_entity_names(head_80[:5])
-                tail_names = _clean_entity_names(list(group.sort_values(ascending=True).head(5).index))
+                head_idx = _cumshare_head(values, total, 0.8, 5)
+                if head_idx.size == 0:
+                    head_idx = np.array([0])
+                head_names = _clean_entity_names(ranked[core_dim].to_numpy()[head_idx])
+                # 尾部只需最小的 5 个：argpartition 线性选出后再对这几个排序
+                base_values = sums['core'][core_metric].to_numpy(dtype=np.float64)
+                k = min(5, len(base_values))
+                tail_idx = np.argpartition(base_values, k - 1)[:k] if k < len(base_values) else np.arange(k)
+                tail_idx = tail_idx[np.lexsort((tail_idx, base_values[tail_idx]))]
+                tail_names = _clean_entity_names(sums['core'][core_dim].to_numpy()[tail_idx])
         results['头部名单'] = head_names
         results['尾部名单'] = tail_names
 
         # 白区/机会：目标品牌欠份额的城市/医院
-        if target_brand and core_dim and core_metric and '城市' in df.columns and core_dim in df.columns and core_metric in df.columns:
+        if target_brand and core_dim and core_metric and '城市' in columns and core_dim in columns and core_metric in columns:
             cb = results.get('城市品牌分布')
             if cb is not None and not cb.empty:
-                city_total = cb[['城市', '城市总量']].drop_duplicates()
-                tgt = cb[cb[core_dim] == target_brand][['城市', core_metric]].rename(columns={core_metric: '目标品牌量'})
-                city_white = city_total.merge(tgt, on='城市', how='left').fillna({'目标品牌量': 0})
+                # 目标品牌命中量作为普通列，一次分组同时得到城市总量与目标品牌量，无需过滤后再合并
+                is_target = (cb[core_dim] == target_brand).to_numpy()
+                city_white = (
+                    cb[['城市', '城市总量']]
+                    .assign(目标品牌量=cb[core_metric].where(is_target, 0))
+                    .groupby('城市', sort=False, observed=True)
+                    .agg(城市总量=('城市总量', 'first'), 目标品牌量=('目标品牌量', 'sum'))
+                    .reset_index()
+                )
                 city_white['目标品牌份额(%)'] = city_white['目标品牌量'] / city_white['城市总量'] * 100
                 city_white = city_white.sort_values(['目标品牌份额(%)', '城市总量'], ascending=[True, False])
                 results['城市白区'] = city_white
@@ -1009,13 +1428,13 @@ class DataAnalyzer:
                 if city_priority is not None and not city_priority.empty:
                     results['机会优先级_城市'] = city_priority
 
-        if target_brand and channel_col and core_dim and core_metric and core_dim in df.columns and core_metric in df.columns:
+        if target_brand and channel_col and core_dim and core_metric and core_dim in columns and core_metric in columns:
             channel_brand = (
-                df.groupby([channel_col, core_dim], as_index=False)[core_metric].sum()
+                self._sum_by(df, [channel_col, core_dim], core_metric, pl_df=pl_df)
                 .sort_values([channel_col, core_metric], ascending=[True, False])
             )
             channel_total = (
-                channel_brand.groupby(channel_col, as_index=False)[core_metric].sum()
+                channel_brand.groupby(channel_col, sort=False, as_index=False)[core_metric].sum()
                 .rename(columns={core_metric: '渠道总量'})
             )
             target_channel = (
@@ -1037,18 +1456,50 @@ class DataAnalyzer:
             if channel_priority is not None and not channel_priority.empty:
                 results['机会优先级_渠道'] = channel_priority
 
-        if target_brand and core_dim and core_metric and core_dim in df.columns and core_metric in df.columns:
-            hosp_col2 = self.detect_focus_entity_column(df)
-            if hosp_col2:
-                entity_label = self.get_entity_label(hosp_col2)
+        if target_brand and core_dim and core_metric and core_dim in columns and core_metric in columns:
+            if hosp_col:
+                entity_label = self.get_entity_label(hosp_col)
                 total_col = f'{entity_label}总量'
-                hb = df.groupby([hosp_col2, core_dim], as_index=False)[core_metric].sum()
-                hosp_total = hb.groupby(hosp_col2, as_index=False)[core_metric].sum().rename(columns={core_metric: total_col})
-                target_h = hb[hb[core_dim] == target_brand].rename(columns={core_metric: '目标品牌量'})[[hosp_col2, '目标品牌量']]
-                hosp_white = hosp_total.merge(target_h, on=hosp_col2, how='left').fillna({'目标品牌量': 0})
+                # 实体只 factorize 一次，单遍扫描同时累加实体总量与目标品牌量
+                # （品牌缺失的行不计入，与按实体×品牌聚合一致）
+                brand = df[core_dim]
+                h_codes, h_uniques = pd.factorize(df[hosp_col], sort=True)
+                group_codes = np.where(brand.isna().to_numpy(), -1, h_codes) if brand.hasnans else h_codes
+                totals, target_totals, counts = _masked_group_sums(
+                    group_codes,
+                    df[core_metric].to_numpy(dtype=np.float64, na_value=np.nan),
+                    (brand == target_brand).to_numpy(),
+                    len(h_uniques),
+                )
+                present = np.flatnonzero(counts)
+                hosp_white = _decategorize(pd.DataFrame({
+                    hosp_col: h_uniques.take(present),
+                    total_col: totals[present],
+                    '目标品牌量': target_totals[present],
+                }))
+                metric_dtype = df[core_metric].dtype
+                if pd.api.types.is_numeric_dtype(metric_dtype) and not pd.api.types.is_bool_dtype(metric_dtype):
+                    hosp_white = hosp_white.astype({total_col: metric_dtype, '目标品牌量': metric_dtype})
                 hosp_white['目标品牌份额(%)'] = hosp_white['目标品牌量'] / hosp_white[total_col] * 100
-                if '城市' in df.columns:
-                    hosp_white = hosp_white.merge(df[[hosp_col2, '城市']].drop_duplicates(), on=hosp_col2, how='left')
+                if '城市' in columns:
+                    # 实体、城市编码组合后去重，得到按首次出现排列的 实体-城市 对
+                    c_codes, c_uniques = pd.factorize(df['城市'])
+                    pair = h_codes.astype(np.int64) * (len(c_uniques) + 1) + (c_codes + 1)
+                    _, first_pos = np.unique(pair, return_index=True)
+                    first_pos.sort()
+                    first_pos = first_pos[h_codes[first_pos] >= 0]
+                    pair_h = h_codes[first_pos]
+                    pair_c = c_codes[first_pos]
+                    # 末尾补一个 NaN，编码 -1（城市缺失）正好取到它
+                    pair_city = np.append(np.asarray(c_uniques, dtype=object), np.nan)[pair_c]
+                    if len(np.unique(pair_h)) == len(pair_h):
+                        # 常见情形：每个实体只对应一个城市，直接映射
+                        hosp_to_city = pd.Series(pair_city, index=np.asarray(h_uniques, dtype=object)[pair_h])
+                        hosp_white['城市'] = hosp_white[hosp_col].map(hosp_to_city).to_numpy()
+                    else:
+                        # 同名实体跨城市时按城市展开，与逐对合并口径一致
+                        pairs = pd.DataFrame({hosp_col: np.asarray(h_uniques, dtype=object)[pair_h], '城市': pair_city})
+                        hosp_white = hosp_white.merge(pairs, on=hosp_col, how='left')
                 hosp_white['重点实体总量'] = hosp_white[total_col]
                 hosp_white['医院总量'] = hosp_white[total_col]
                 hosp_white['重点实体类型'] = entity_label
@@ -1058,7 +1509,7 @@ class DataAnalyzer:
                 results['机会医院'] = hosp_white
                 hosp_priority = self.build_opportunity_priority(
                     df=hosp_white,
-                    entity_col=hosp_col2,
+                    entity_col=hosp_col,
                     total_col=total_col,
                     share_col='目标品牌份额(%)',
                     target_volume_col='目标品牌量',
@@ -1075,7 +1526,7 @@ class DataAnalyzer:
         price_info = None
         price_col = None
         for cand in ['中选价格', '价格', '单价']:
-            if cand in df.columns:
+            if cand in columns:
                 price_col = cand
                 break
         if price_col and core_metric:
@@ -1092,8 +1543,12 @@ class DataAnalyzer:
                         relation = "相关性较强"
                 price_med = df_price[price_col].median()
                 qty_med = df_price[core_metric].median()
-                lphv = df_price[(df_price[price_col] <= price_med) & (df_price[core_metric] >= qty_med)][core_dim].dropna().astype(str).unique().tolist()
-                hplv = df_price[(df_price[price_col] > price_med) & (df_price[core_metric] < qty_med)][core_dim].dropna().astype(str).unique().tolist()
+                # 两个象限共用同一组掩码（df_price 已去空值，高价/低量即低价/高量取反）
+                dims = df_price[core_dim].to_numpy()
+                low_price = df_price[price_col].to_numpy() <= price_med
+                high_qty = df_price[core_metric].to_numpy() >= qty_med
+                lphv = list(dict.fromkeys(str(v) for v in pd.unique(dims[low_price & high_qty])))
+                hplv = list(dict.fromkeys(str(v) for v in pd.unique(dims[~low_price & ~high_qty])))
                 price_info = {
                     '价格列': price_col,
                     '相关系数': corr,
@@ -1125,8 +1580,9 @@ class DataAnalyzer:
         # 时间趋势摘要（若存在）
         trend_summary = None
         if time_trend is not None and not time_trend.empty and len(time_trend) >= 2:
-            start_v = float(time_trend['数值'].iloc[0])
-            end_v = float(time_trend['数值'].iloc[-1])
+            trend_values = time_trend['数值'].to_numpy()
+            start_v = float(trend_values[0])
+            end_v = float(trend_values[-1])
             if end_v > start_v:
                 dir_text = "上升"
             elif end_v < start_v:
@@ -1164,75 +1620,85 @@ class DataAnalyzer:
             company_share = 0
             if brand_col and share_col:
                 rank_source = brand_share.sort_values(share_col, ascending=False).reset_index(drop=True)
-                if company_name in rank_source[brand_col].values:
-                    company_rank = rank_source[rank_source[brand_col] == company_name].index[0] + 1
-                    company_share = rank_source[rank_source[brand_col] == company_name][share_col].iloc[0]
+                # 一次比较定位目标所在行，排名与份额按位置取值
+                hits = np.flatnonzero(rank_source[brand_col].to_numpy() == company_name)
+                if hits.size:
+                    company_rank = int(hits[0]) + 1
+                    company_share = rank_source[share_col].iat[hits[0]]
 
                 insights['市场地位'] = {
                     '排名': company_rank,
                     '份额': f"{company_share:.2f}%",
-                    '领先对象': rank_source.iloc[0][brand_col] if len(rank_source) > 0 else '未知'
+                    '领先对象': rank_source[brand_col].iat[0] if len(rank_source) > 0 else '未知'
                 }
 
         # 机会洞察（若存在）
         opp_cities = analysis_results.get('机会城市')
         if opp_cities is not None and len(opp_cities) > 0:
-            top_opp_city = opp_cities.iloc[0]
             total_col = next((col for col in ['城市总量', '总容量', '总量'] if col in opp_cities.columns), None)
             share_col = next((col for col in ['目标品牌份额(%)', '林华份额'] if col in opp_cities.columns), None)
             insights['机会城市'] = {
-                '最佳机会': top_opp_city['城市'],
-                '容量': f"{top_opp_city[total_col]:,.0f}" if total_col else '未知',
-                '当前份额': f"{top_opp_city[share_col]:.2f}%" if share_col else '未知'
+                '最佳机会': opp_cities['城市'].iat[0],
+                '容量': f"{opp_cities[total_col].iat[0]:,.0f}" if total_col else '未知',
+                '当前份额': f"{opp_cities[share_col].iat[0]:.2f}%" if share_col else '未知'
             }
 
         # 竞争洞察（若存在）
         coverage = analysis_results.get('覆盖分析')
         core_dim = analysis_results.get('核心维度')
-        if coverage is not None and core_dim and company_name and core_dim in coverage.columns and company_name in coverage[core_dim].values:
-            comp_data = coverage[coverage[core_dim] == company_name].iloc[0]
-            entity_label = comp_data.get('覆盖对象类型', '重点实体')
+        hits = np.empty(0, dtype=np.intp)
+        if coverage is not None and core_dim and company_name and core_dim in coverage.columns:
+            hits = np.flatnonzero(coverage[core_dim].to_numpy() == company_name)
+        if hits.size:
+            # 按列取单个标量，不构造整行 Series
+            pos = hits[0]
+            def comp_value(col, default):
+                return coverage[col].iat[pos] if col in coverage.columns else default
+            entity_label = comp_value('覆盖对象类型', '重点实体')
             insights['覆盖情况'] = {
-                f'覆盖{entity_label}数': f"{int(comp_data.get('覆盖实体数', comp_data.get('覆盖医院数', 0)))}",
-                f'单{entity_label}均量': f"{comp_data.get('单实体均量', comp_data.get('单院均量', 0)):,.0f}",
-                '总业务量': f"{comp_data['总量']:,.0f}"
+                f'覆盖{entity_label}数': f"{int(comp_value('覆盖实体数', comp_value('覆盖医院数', 0)))}",
+                f'单{entity_label}均量': f"{comp_value('单实体均量', comp_value('单院均量', 0)):,.0f}",
+                '总业务量': f"{coverage['总量'].iat[pos]:,.0f}"
             }
 
         # 通用洞察
         general_insights = []
         numeric_stats = analysis_results.get('数值列统计')
         if numeric_stats is not None and not numeric_stats.empty:
-            top_metric = numeric_stats.sort_values('均值', ascending=False).iloc[0]
+            top_idx = _extreme_index(numeric_stats['均值'])
             general_insights.append({
                 'icon': 'fas fa-gem',
                 'title': '核心指标',
-                'content': f"{top_metric['字段']} 平均值 {top_metric['均值']:.2f}，可作为关键指标重点关注。"
+                'content': f"{numeric_stats.at[top_idx, '字段']} 平均值 {numeric_stats.at[top_idx, '均值']:.2f}，可作为关键指标重点关注。"
             })
             if len(numeric_stats) > 1:
-                volatile_metric = numeric_stats.sort_values('标准差', ascending=False).iloc[0]
+                # 各列都只有一个值时标准差全为 NaN，退回首行
+                volatile_idx = _extreme_index(numeric_stats['标准差'])
                 general_insights.append({
                     'icon': 'fas fa-wave-square',
                     'title': '波动提醒',
-                    'content': f"{volatile_metric['字段']} 波动幅度最大（标准差 {volatile_metric['标准差']:.2f}），建议排查异常波动来源。"
+                    'content': f"{numeric_stats.at[volatile_idx, '字段']} 波动幅度最大（标准差 {numeric_stats.at[volatile_idx, '标准差']:.2f}），建议排查异常波动来源。"
                 })
 
         categorical_summary = analysis_results.get('分类分布')
         if categorical_summary is not None and not categorical_summary.empty:
-            top_category = categorical_summary.sort_values('占比(%)', ascending=False).iloc[0]
+            top_idx = _extreme_index(categorical_summary['占比(%)'])
             general_insights.append({
                 'icon': 'fas fa-layer-group',
                 'title': '最集中的分类',
-                'content': f"{top_category['字段']} 中 {top_category['类别']} 占比 {top_category['占比(%)']:.2f}%，代表当前最主要的构成。"
+                'content': f"{categorical_summary.at[top_idx, '字段']} 中 {categorical_summary.at[top_idx, '类别']} 占比 {categorical_summary.at[top_idx, '占比(%)']:.2f}%，代表当前最主要的构成。"
             })
 
         corr_matrix = analysis_results.get('相关性矩阵')
         if corr_matrix is not None:
-            corr_abs = corr_matrix.abs().copy()
-            np.fill_diagonal(corr_abs.values, 0)
-            stacked = corr_abs.stack()
-            if not stacked.empty and stacked.max() > 0:
-                idx = stacked.idxmax()
-                value = corr_matrix.loc[idx]
+            # 相关矩阵对称，只在上三角（不含对角线）中找绝对值最大者
+            values = corr_matrix.to_numpy()
+            rows, cols = np.triu_indices(values.shape[0], k=1)
+            upper_abs = np.abs(values[rows, cols])
+            if upper_abs.size and not np.isnan(upper_abs).all() and np.nanmax(upper_abs) > 0:
+                k = int(np.nanargmax(upper_abs))
+                idx = (corr_matrix.index[rows[k]], corr_matrix.columns[cols[k]])
+                value = values[rows[k], cols[k]]
                 general_insights.append({
                     'icon': 'fas fa-link',
                     'title': '强相关指标',
@@ -1242,8 +1708,15 @@ class DataAnalyzer:
         time_trend = analysis_results.get('时间趋势')
         opportunity_suggestions = []
         if time_trend is not None and len(time_trend) >= 2:
-            start_value = float(time_trend['数值'].iloc[0])
-            end_value = float(time_trend['数值'].iloc[-1])
+            # 综合分析已在时间趋势摘要中取好起止值，直接复用
+            trend_summary = analysis_results.get('时间趋势摘要')
+            if trend_summary:
+                start_value = trend_summary['起始']
+                end_value = trend_summary['当前']
+            else:
+                trend_values = time_trend['数值'].to_numpy()
+                start_value = float(trend_values[0])
+                end_value = float(trend_values[-1])
             direction = '上升' if end_value > start_value else ('下降' if end_value < start_value else '平稳')
             general_insights.append({
                 'icon': 'fas fa-chart-line',
@@ -1257,38 +1730,32 @@ class DataAnalyzer:
             })
 
         if categorical_summary is not None and not categorical_summary.empty:
-            tail_category = categorical_summary.sort_values('占比(%)', ascending=True).iloc[0]
+            tail_idx = _extreme_index(categorical_summary['占比(%)'], largest=False)
             opportunity_suggestions.append({
                 'icon': 'fas fa-lightbulb',
                 'title': '潜在增量',
-                'description': f"{tail_category['字段']} 中 {tail_category['类别']} 占比仅 {tail_category['占比(%)']:.2f}%，可作为差异化突破点。"
+                'description': f"{categorical_summary.at[tail_idx, '字段']} 中 {categorical_summary.at[tail_idx, '类别']} 占比仅 {categorical_summary.at[tail_idx, '占比(%)']:.2f}%，可作为差异化突破点。"
             })
 
         city_priority = analysis_results.get('机会优先级_城市')
         if city_priority is not None and not city_priority.empty and '城市' in city_priority.columns:
-            top_city = city_priority.iloc[0]
             opportunity_suggestions.append({
                 'icon': 'fas fa-location-dot',
                 'title': '优先城市',
-                'description': f"优先级最高城市为 {top_city['城市']}（综合分 {top_city['综合优先级分']:.1f}），建议优先配置市场动作。"
+                'description': f"优先级最高城市为 {city_priority['城市'].iat[0]}（综合分 {city_priority['综合优先级分'].iat[0]:.1f}），建议优先配置市场动作。"
             })
 
         hosp_priority = analysis_results.get('机会优先级_重点实体')
         if hosp_priority is None or hosp_priority.empty:
             hosp_priority = analysis_results.get('机会优先级_医院')
         if hosp_priority is not None and not hosp_priority.empty:
-            name_col = None
-            for cand in ['医院名称', '医疗机构名称', '客户名称', '客户', '机构名称', '机构', '门店名称', '门店']:
-                if cand in hosp_priority.columns:
-                    name_col = cand
-                    break
+            name_col = self.detect_focus_entity_column(hosp_priority)
             if name_col:
-                top_hosp = hosp_priority.iloc[0]
                 entity_label = self.get_entity_label(name_col)
                 opportunity_suggestions.append({
                     'icon': 'fas fa-bullseye',
                     'title': f'优先{entity_label}',
-                    'description': f"优先级最高的{entity_label}为 {top_hosp[name_col]}（综合分 {top_hosp['综合优先级分']:.1f}），可作为近期突破点。"
+                    'description': f"优先级最高的{entity_label}为 {hosp_priority[name_col].iat[0]}（综合分 {hosp_priority['综合优先级分'].iat[0]:.1f}），可作为近期突破点。"
                 })
 
         if general_insights:
@@ -5,55 +5,340 @@
 将分析结果以“数即结论”的方式呈现，结构与Word报告保持一致，不强行出无意义板块。
 """
 
+import hashlib
+import io
 import os
-import base64
+import re
+import shutil
+import threading
+from binascii import b2a_base64
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
+from types import MappingProxyType
+
+import pandas as pd
+from urllib.parse import quote
 
 try:
-    from jinja2 import Template
+    from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, Template
 except ModuleNotFoundError:
     Template = None
+
+try:
+    from PIL import Image
+except ModuleNotFoundError:
+    Image = None
+
+# 已编译模板按模板源码缓存，进程内只解析一次
+_TEMPLATE_CACHE = {}
+_TEMPLATE_NAME = 'infographic.html'
+# 图片分块 base64 编码的块大小（须为 3 的倍数）
+_BASE64_CHUNK_SIZE = 57 * 1024
+# 每个生成器最多缓存的图片编码结果数
+_BASE64_CACHE_SIZE = 32
+# inline_images='auto' 时超过该大小的图表不内嵌，复制到 HTML 旁按相对路径引用
+_INLINE_IMAGE_MAX_BYTES = 128 * 1024
+# use_webp 时 PNG 转 WebP 的质量参数（图表类图片 85 以上肉眼无损）
+_WEBP_QUALITY = 85
+# 字节码缓存文件名：autoescape 会编译进字节码而不参与缓存校验，文件名带上该选项，选项变化后不复用旧缓存
+_BYTECODE_CACHE_PATTERN = '__jinja2_autoescape_%s.cache'
+
+
+def _bytecode_cache():
+    """模板字节码缓存（系统临时目录下按用户隔离），目录不可用时不启用"""
+    try:
+        return FileSystemBytecodeCache(pattern=_BYTECODE_CACHE_PATTERN)
+    except (OSError, RuntimeError):
+        return None
+
+
+# 信息图内嵌的核心图表：(chart_paths 键, 标题)，按展示顺序
+_CHART_ORDER = (
+    ('core_share', '核心维度份额'),
+    ('city_share', '城市分布'),
+    ('category_share', '目录份额'),
+    ('major_share', '产品大类分布'),
+    ('coverage', '覆盖与单实体均量'),
+)
+# 每个生成器最多缓存的上下文数
+_CONTEXT_CACHE_SIZE = 16
+# build_context 读取的分析结果键（只对这些内容计算指纹）
+_CONTEXT_RESULT_KEYS = (
+    '核心维度', '核心指标列', '集中度分析', '头部名单', '尾部名单', '价格分析',
+    '结构概览', '时间趋势摘要', '核心维度分布', '城市分布', '目录分布', '覆盖分析',
+)
+# 只读的空映射/空元组作缺省值，避免每次构建上下文都新建空 dict/list
+_EMPTY_MAPPING = MappingProxyType({})
+# 编译前压缩模板源码（调试模板排版时可关闭）
+_MINIFY_TEMPLATE = True
+# 数据速览最多展示的条数
+_OVERVIEW_MAX_ITEMS = 8
+# 数据速览规则表：(是否适用, 生成文案)，按顺序输出
+_OVERVIEW_RULES = (
+    (lambda c: True,
+     lambda c: f"按 {c['core_dim']} 汇总 {c['core_metric']}"),
+    (lambda c: c['concentration'] and c['concentration'].get('最大值_中位数倍数'),
+     lambda c: f"最大值约为中位数的 {c['concentration']['最大值_中位数倍数']:.1f} 倍"),
+    (lambda c: c['concentration'],
+     lambda c: f"集中度：Top1 {c['concentration']['Top1占比']:.1f}% / Top3 {c['concentration']['Top3占比']:.1f}% / Top5 {c['concentration']['Top5占比']:.1f}%"),
+    (lambda c: c['concentration'],
+     lambda c: f"覆盖80%需约 {c['concentration']['覆盖80所需实体数']} 个{c['core_dim']}，覆盖90%需约 {c['concentration']['覆盖90所需实体数']} 个"),
+    (lambda c: c['concentration'],
+     lambda c: f"离群：高值 {c['concentration']['高值离群数']} 个，低值 {c['concentration']['低值离群数']} 个"),
+    (lambda c: c['head_names'],
+     lambda c: f"头部{c['core_dim']}：{c['head_list']}"),
+    (lambda c: c['tail_names'],
+     lambda c: f"尾部试点：{c['tail_list']}"),
+    (lambda c: c['price_summary'] and c['price_summary'].get('corr'),
+     lambda c: c['price_summary']['corr'] + ("；" + c['price_summary']['quadrant'] if c['price_summary'].get('quadrant') else "")),
+    (lambda c: c['structure_text'],
+     lambda c: f"结构：{c['structure_text']}"),
+    (lambda c: c['trend_text'],
+     lambda c: c['trend_text']),
+)
+
+
+def _update_fingerprint(h, value):
+    """将结果对象的内容写入哈希：表格走 pandas 向量化哈希，容器逐项递归，其余取 repr"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(b'F' if isinstance(value, pd.DataFrame) else b'S')
+        meta = (list(value.columns), [str(t) for t in value.dtypes]) if isinstance(value, pd.DataFrame) else (value.name, str(value.dtype))
+        h.update(repr(meta).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        except TypeError:
+            # 含不可哈希单元格（如列表）时退回文本表示
+            h.update(value.to_csv().encode())
+    elif isinstance(value, dict):
+        h.update(b'{%d' % len(value))
+        for k, v in value.items():
+            _update_fingerprint(h, k)
+            _update_fingerprint(h, v)
+    elif isinstance(value, (list, tuple)):
+        h.update(b'[%d' % len(value))
+        for v in value:
+            _update_fingerprint(h, v)
+    else:
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+def _context_fingerprint(analysis_results, insights, company_name):
+    """上下文文字部分的内容指纹"""
+    h = hashlib.blake2b(digest_size=16)
+    for key in _CONTEXT_RESULT_KEYS:
+        _update_fingerprint(h, analysis_results.get(key))
+    _update_fingerprint(h, insights)
+    _update_fingerprint(h, company_name)
+    return h.digest()
+
+
+def _minify_template(source):
+    """压缩模板源码：样式块折叠空白（只去掉 {};, 两侧的空白），其余各行去掉缩进并丢弃空行（保留换行，行内元素间距不变）"""
+    head, style_open, rest = source.partition('<style>')
+    css, style_close, tail = rest.partition('</style>')
+    if style_open and style_close:
+        # 冒号两侧的空白不动：选择器里 `.card :hover` 与 `.card:hover` 含义不同
+        css = re.sub(r'\s*([{};,])\s*', r'\1', re.sub(r'\s+', ' ', css)).strip()
+        source = head + style_open + css + style_close + tail
+    return '\n'.join(line.strip() for line in source.splitlines() if line.strip())
+
+
+def _png_to_webp(image_path):
+    """PNG 转为 WebP 字节；Pillow 不可用、非 PNG 或转换失败时返回 None"""
+    if Image is None or not image_path.lower().endswith('.png'):
+        return None
+    try:
+        buf = io.BytesIO()
+        with Image.open(image_path) as img:
+            img.save(buf, format='WEBP', quality=_WEBP_QUALITY, method=4)
+        return buf.getvalue()
+    except Exception:
+        return None
+
+
+def _fmt_list(names, max_n=5):
+    """名单拼接为顿号分隔文本，超过 max_n 个时截断并加“等”；只转换前 max_n+1 个非空名称"""
+    names = list(islice((str(n) for n in names if n), max_n + 1))
+    if len(names) > max_n:
+        return "、".join(names[:max_n]) + " 等"
+    return "、".join(names)
+
+
+def _first_row(frame):
+    """取首行为 {列名: 值}，逐列按位置取标量，不构造混合类型的行 Series"""
+    return {col: frame.iat[0, i] for i, col in enumerate(frame.columns)}
 
 
 class InfographicGenerator:
     """信息图生成器"""
 
-    def __init__(self, template_dir='templates', output_dir='outputs/html'):
+    def __init__(self, template_dir='templates', output_dir='outputs/html',
+                 inline_images='auto', inline_threshold=_INLINE_IMAGE_MAX_BYTES, use_webp=False):
+        """
+        Args:
+            inline_images: 图表嵌入方式。True 全部 base64 内嵌；False 全部复制到 HTML 旁引用；
+                'auto' 仅超过 inline_threshold 字节的图表改为引用
+            inline_threshold: 'auto' 模式下内嵌的大小上限（字节）
+            use_webp: 内嵌的 PNG 先转为 WebP 再编码（需 Pillow），数据 URL 通常缩小一半以上
+        """
         self.template_dir = template_dir
         self.output_dir = output_dir
+        self.inline_images = inline_images
+        self.inline_threshold = inline_threshold
+        self.use_webp = use_webp
+        # (路径, 修改时间, 大小) -> data URL，按最近使用淘汰；图表并行编码时多线程读写，用锁保护
+        self._base64_cache = OrderedDict()
+        self._base64_cache_lock = threading.Lock()
+        # 内容指纹 -> 上下文文字部分，按最近使用淘汰
+        self._context_cache = OrderedDict()
         self.create_output_dir()
 
     def create_output_dir(self):
         """创建输出目录"""
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def encode_image_to_base64(self, image_path):
-        """将图片转换为base64编码"""
+    def encode_image_to_base64(self, image_path, entry=None):
+        """将图片转换为base64编码（文件未变时复用上次的编码结果；传入 os.scandir 的 entry 时复用其 stat）"""
         try:
-            with open(image_path, "rb") as image_file:
-                encoded = base64.b64encode(image_file.read()).decode()
-                return f"data:image/png;base64,{encoded}"
+            st = entry.stat() if entry is not None else os.stat(image_path)
+            key = (image_path, st.st_mtime_ns, st.st_size)
+            with self._base64_cache_lock:
+                cached = self._base64_cache.get(key)
+                if cached is not None:
+                    self._base64_cache.move_to_end(key)
+                    return cached
+            webp = _png_to_webp(image_path) if self.use_webp else None
+            if webp is not None:
+                data_url = "data:image/webp;base64," + b2a_base64(webp, newline=False).decode('ascii')
+            else:
+                data_url = self._encode_file(image_path)
         except Exception:
             return ""
+        # 编码在锁外进行；同一张图被并发编码时后写入的覆盖先写入的，结果相同
+        with self._base64_cache_lock:
+            self._base64_cache[key] = data_url
+            self._base64_cache.move_to_end(key)
+            if len(self._base64_cache) > _BASE64_CACHE_SIZE:
+                self._base64_cache.popitem(last=False)
+        return data_url
+
+    @staticmethod
+    def _encode_file(image_path):
+        """原始字节编码为 PNG data URL"""
+        # 按 3 的整数倍分块编码，块间无填充，拼接结果与整体编码一致，且不保留整份原始字节
+        encoded = bytearray()
+        with open(image_path, "rb") as image_file:
+            while True:
+                chunk = image_file.read(_BASE64_CHUNK_SIZE)
+                if not chunk:
+                    break
+                encoded += b2a_base64(chunk, newline=False)
+        return "data:image/png;base64," + encoded.decode('ascii')
+
+    def link_image(self, image_path):
+        """将图片复制到 HTML 输出目录，返回供 img 引用的相对路径；复制失败返回空串"""
+        name = os.path.basename(image_path)
+        target = os.path.join(self.output_dir, name)
+        try:
+            if not (os.path.exists(target) and os.path.samefile(image_path, target)):
+                shutil.copy2(image_path, target)
+        except OSError:
+            return ""
+        return quote(name)
 
-    def build_context(self, analysis_results, insights=None, chart_paths=None, company_name=''):
-        """从分析结果构建用于渲染HTML的上下文"""
-        core_dim = analysis_results.get('核心维度') or '核心维度'
-        core_metric = analysis_results.get('核心指标列') or '核心指标'
-        concentration = analysis_results.get('集中度分析')
-        head_names = analysis_results.get('头部名单') or []
-        tail_names = analysis_results.get('尾部名单') or []
-        price_info = analysis_results.get('价格分析') or {}
-        structure_summary = analysis_results.get('结构概览')
-        trend_summary = analysis_results.get('时间趋势摘要')
-
-        def fmt_list(names, max_n=5):
-            names = [str(n) for n in names if n]
-            if not names:
-                return ""
-            if len(names) > max_n:
-                return "、".join(names[:max_n]) + " 等"
-            return "、".join(names)
+    def image_src(self, image_path, entry=None):
+        """按 inline_images 设置决定图表内嵌为 data URL 还是按相对路径引用"""
+        inline = self.inline_images
+        if inline == 'auto':
+            try:
+                size = (entry.stat() if entry is not None else os.stat(image_path)).st_size
+            except OSError:
+                size = 0
+            inline = size <= self.inline_threshold
+        if not inline:
+            src = self.link_image(image_path)
+            if src:
+                return src
+        return self.encode_image_to_base64(image_path, entry)
+
+    def build_chart_images(self, chart_paths):
+        """核心图表列表：[{'title', 'dataurl'}]，按 _CHART_ORDER 顺序，缺失的图跳过"""
+        chart_images = []
+        if not chart_paths:
+            return chart_images
+        candidates = []
+        for key, title in _CHART_ORDER:
+            val = chart_paths.get(key)
+            png = None
+            if isinstance(val, dict):
+                png = val.get('png')
+            elif isinstance(val, (list, tuple)) and len(val) > 0:
+                png = val[0]
+            if png:
+                candidates.append((title, png))
+        # 图表通常同在一个目录：每个目录只 scandir 一次，代替逐个 exists + stat
+        dir_entries = {}
+        for folder in {os.path.dirname(png) or '.' for _, png in candidates}:
+            try:
+                with os.scandir(folder) as it:
+                    dir_entries[folder] = {e.name: e for e in it}
+            except OSError:
+                dir_entries[folder] = {}
+        found = []
+        for title, png in candidates:
+            entry = dir_entries[os.path.dirname(png) or '.'].get(os.path.basename(png))
+            if entry is not None and entry.is_file():
+                found.append((title, png, entry))
+        # 各图读盘与 base64 编码相互独立（编码在 C 层释放 GIL），多张图时并行处理，结果按原顺序
+        if len(found) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(found), 4)) as pool:
+                sources = list(pool.map(lambda item: self.image_src(item[1], item[2]), found))
+        else:
+            sources = [self.image_src(png, entry) for _, png, entry in found]
+        # 读取失败（如列目录后文件被移走）时编码结果为空串，不输出空图
+        for (title, _, _), src in zip(found, sources):
+            if src:
+                chart_images.append({
+                    'title': title,
+                    'dataurl': src
+                })
+        return chart_images
+
+    def build_context(self, analysis_results, insights=None, chart_paths=None, company_name='', generation_time=None):
+        """
+        从分析结果构建用于渲染HTML的上下文（generation_time 未传入时取当前时间）
+
+        文字部分只依赖分析结果、洞察与公司名，按内容指纹缓存，数据未变时直接复用；
+        图表每次重新解析（编码结果另有按文件缓存），生成时间每次单独填入。
+        """
+        key = _context_fingerprint(analysis_results, insights, company_name)
+        text_context = self._context_cache.get(key)
+        if text_context is None:
+            text_context = self._build_text_context(analysis_results, insights, company_name)
+            self._context_cache[key] = text_context
+            if len(self._context_cache) > _CONTEXT_CACHE_SIZE:
+                self._context_cache.popitem(last=False)
+        else:
+            self._context_cache.move_to_end(key)
+        return {
+            **text_context,
+            'generation_time': generation_time or datetime.now().strftime('%Y-%m-%d %H:%M'),
+            'chart_images': self.build_chart_images(chart_paths),
+        }
+
+    def _build_text_context(self, analysis_results, insights, company_name):
+        """上下文中由分析结果与洞察决定的文字部分（会被缓存复用，生成的列表与字典以只读形式返回）"""
+        get = analysis_results.get
+        core_dim = get('核心维度') or '核心维度'
+        core_metric = get('核心指标列') or '核心指标'
+        concentration = get('集中度分析')
+        head_names = get('头部名单') or ()
+        tail_names = get('尾部名单') or ()
+        price_info = get('价格分析') or _EMPTY_MAPPING
+        structure_summary = get('结构概览')
+        trend_summary = get('时间趋势摘要')
 
         # 价格段落
         price_summary = None
@@ -63,17 +348,17 @@ class InfographicGenerator:
             corr_txt = None
             if corr is not None and relation:
                 corr_txt = f"{price_info.get('价格列')} 与 {core_metric} 的相关系数约 {corr:.2f}，{relation}"
-            lphv = fmt_list(price_info.get('低价高量') or [])
-            hplv = fmt_list(price_info.get('高价低量') or [])
+            lphv = _fmt_list(price_info.get('低价高量') or ())
+            hplv = _fmt_list(price_info.get('高价低量') or ())
             segments = []
             if lphv:
                 segments.append(f"低价高量代表：{lphv}")
             if hplv:
                 segments.append(f"高价低量代表：{hplv}")
-            price_summary = {
+            price_summary = MappingProxyType({
                 'corr': corr_txt,
                 'quadrant': "；".join(segments) if segments else ""
-            }
+            })
 
         # 结构段落
         structure_text = None
@@ -97,24 +382,24 @@ class InfographicGenerator:
                 trend_text = f"趋势：{dir_text}（{start_v:,.1f} → {end_v:,.1f}）"
 
         # 核心结论：总量/CR3/CR5/头部/主力/覆盖
-        core_share = analysis_results.get('核心维度分布')
-        city_share = analysis_results.get('城市分布')
-        cat_share = analysis_results.get('目录分布')
-        coverage_df = analysis_results.get('覆盖分析')
+        core_share = get('核心维度分布')
+        city_share = get('城市分布')
+        cat_share = get('目录分布')
+        coverage_df = get('覆盖分析')
         total_val = None
         core_top = None
         city_top = None
         cat_top = None
         coverage_leader = None
         if core_share is not None and not core_share.empty:
-            total_val = float(core_share.iloc[:, 1].sum())
-            core_top = core_share.iloc[0]
+            total_val = float(core_share.iloc[:, 1].to_numpy().sum())
+            core_top = _first_row(core_share)
         if city_share is not None and not city_share.empty:
-            city_top = city_share.iloc[0]
+            city_top = _first_row(city_share)
         if cat_share is not None and not cat_share.empty:
-            cat_top = cat_share.iloc[0]
+            cat_top = _first_row(cat_share)
         if coverage_df is not None and not coverage_df.empty:
-            coverage_leader = coverage_df.iloc[0]
+            coverage_leader = _first_row(coverage_df)
 
         core_summary = []
         if total_val is not None:
@@ -123,18 +408,18 @@ class InfographicGenerator:
                 txt += f"，CR3≈ {concentration['Top3占比']:.1f}%，CR5≈ {concentration['Top5占比']:.1f}%"
             core_summary.append(txt + "。")
         if core_top is not None:
-            core_summary.append(f"龙头：{core_top[core_dim]}，约 {core_top['份额(%)']:.2f}% / {core_top.iloc[1]:,.0f}。")
+            core_summary.append(f"龙头：{core_top[core_dim]}，约 {core_top['份额(%)']:.2f}% / {core_top[core_share.columns[1]]:,.0f}。")
         if cat_top is not None:
-            core_summary.append(f"主力目录：{cat_top['目录名称']}（{cat_top.iloc[1]:,.0f}）。")
+            core_summary.append(f"主力目录：{cat_top['目录名称']}（{cat_top[cat_share.columns[1]]:,.0f}）。")
         if city_top is not None:
-            core_summary.append(f"主力城市：{city_top['城市']}（{city_top.iloc[1]:,.0f}）。")
+            core_summary.append(f"主力城市：{city_top['城市']}（{city_top[city_share.columns[1]]:,.0f}）。")
         entity_count_col = None
         avg_col = None
         entity_label = '重点实体'
         if coverage_leader is not None:
-            entity_count_col = next((col for col in ['覆盖实体数', '覆盖医院数'] if col in coverage_leader.index), None)
-            avg_col = next((col for col in ['单实体均量', '单院均量'] if col in coverage_leader.index), None)
-            if '覆盖对象类型' in coverage_leader.index and coverage_leader['覆盖对象类型']:
+            entity_count_col = next((col for col in ['覆盖实体数', '覆盖医院数'] if col in coverage_leader), None)
+            avg_col = next((col for col in ['单实体均量', '单院均量'] if col in coverage_leader), None)
+            if '覆盖对象类型' in coverage_leader and coverage_leader['覆盖对象类型']:
                 entity_label = str(coverage_leader['覆盖对象类型']).strip() or entity_label
         if coverage_leader is not None and entity_count_col and avg_col and '城市覆盖数' in coverage_leader:
             core_summary.append(
@@ -142,101 +427,130 @@ class InfographicGenerator:
                 f"{int(coverage_leader['城市覆盖数'])} 个城市，单{entity_label}均量约 {coverage_leader[avg_col]:,.0f}。"
             )
 
-        # 数据速览 bullet（通用）
-        overview = []
-        overview.append(f"按 {core_dim} 汇总 {core_metric}")
-        if concentration:
-            max_ratio = concentration.get('最大值_中位数倍数')
-            if max_ratio:
-                overview.append(f"最大值约为中位数的 {max_ratio:.1f} 倍")
-            overview.append(
-                f"集中度：Top1 {concentration['Top1占比']:.1f}% / Top3 {concentration['Top3占比']:.1f}% / Top5 {concentration['Top5占比']:.1f}%"
-            )
-            overview.append(
-                f"覆盖80%需约 {concentration['覆盖80所需实体数']} 个{core_dim}，覆盖90%需约 {concentration['覆盖90所需实体数']} 个"
-            )
-            overview.append(
-                f"离群：高值 {concentration['高值离群数']} 个，低值 {concentration['低值离群数']} 个"
-            )
-        if head_names:
-            overview.append(f"头部{core_dim}：{fmt_list(head_names)}")
-        if tail_names:
-            overview.append(f"尾部试点：{fmt_list(tail_names)}")
-        if price_summary and price_summary.get('corr'):
-            txt = price_summary['corr']
-            if price_summary.get('quadrant'):
-                txt += "；" + price_summary['quadrant']
-            overview.append(txt)
-        if structure_text:
-            overview.append(f"结构：{structure_text}")
-        if trend_text:
-            overview.append(trend_text)
-
-        # 核心图表（base64）
-        chart_images = []
-        if chart_paths:
-            title_map = {
-                'core_share': '核心维度份额',
-                'city_share': '城市分布',
-                'category_share': '目录份额',
-                'major_share': '产品大类分布',
-                'coverage': '覆盖与单实体均量',
-            }
-            for key in ['core_share', 'city_share', 'category_share', 'major_share', 'coverage']:
-                val = chart_paths.get(key)
-                png = None
-                if isinstance(val, dict):
-                    png = val.get('png')
-                elif isinstance(val, (list, tuple)) and len(val) > 0:
-                    png = val[0]
-                if png and os.path.exists(png):
-                    chart_images.append({
-                        'title': title_map.get(key, key),
-                        'dataurl': self.encode_image_to_base64(png)
-                    })
-
-        insights = insights or {}
-        report_style = insights.get('report_style') or {}
-        core_diagnosis = insights.get('core_diagnosis') or {}
+        # 数据速览 bullet（通用）：按规则表顺序生成，取满 8 条即停，后续规则不再格式化
+        head_list = _fmt_list(head_names)
+        tail_list = _fmt_list(tail_names)
+        overview_src = {
+            'core_dim': core_dim,
+            'core_metric': core_metric,
+            'concentration': concentration,
+            'head_names': head_names,
+            'head_list': head_list,
+            'tail_names': tail_names,
+            'tail_list': tail_list,
+            'price_summary': price_summary,
+            'structure_text': structure_text,
+            'trend_text': trend_text,
+        }
+        overview = tuple(islice(
+            (fmt(overview_src) for pred, fmt in _OVERVIEW_RULES if pred(overview_src)),
+            _OVERVIEW_MAX_ITEMS,
+        ))
+
+        insights = insights or _EMPTY_MAPPING
+        report_style = insights.get('report_style') or _EMPTY_MAPPING
+        core_diagnosis = insights.get('core_diagnosis') or _EMPTY_MAPPING
 
         return {
             'title': f"{company_name}数据分析报告" if company_name else "数据分析报告",
             'subtitle': f"核心维度：{core_dim} | 核心指标：{core_metric}",
-            'generation_time': datetime.now().strftime('%Y-%m-%d %H:%M'),
-            'overview': overview[:8],
-            'core_summary': core_summary,
-            'executive_summary': insights.get('executive_summary') or [],
-            'diagnosis_points': core_diagnosis.get('supporting_points') or [],
-            'model_analysis': insights.get('model_analysis') or [],
-            'action_plan': insights.get('action_plan_90d') or [],
-            'do_not_do': insights.get('do_not_do') or [],
-            'risk_controls': insights.get('risk_controls') or [],
+            'overview': overview,
+            'core_summary': tuple(core_summary),
+            'executive_summary': insights.get('executive_summary') or (),
+            'diagnosis_points': core_diagnosis.get('supporting_points') or (),
+            'model_analysis': insights.get('model_analysis') or (),
+            'action_plan': insights.get('action_plan_90d') or (),
+            'do_not_do': insights.get('do_not_do') or (),
+            'risk_controls': insights.get('risk_controls') or (),
             'report_style': report_style,
             'core_dim': core_dim,
-            'head_list': fmt_list(head_names),
-            'tail_list': fmt_list(tail_names),
+            'head_list': head_list,
+            'tail_list': tail_list,
             'concentration': concentration,
             'price_summary': price_summary,
             'structure_text': structure_text,
             'trend_text': trend_text,
-            'chart_images': chart_images
         }
 
-    def generate_infographic_html(self, analysis_results, chart_paths, insights, company_name=''):
-        """生成信息图HTML文本"""
-        context = self.build_context(analysis_results, insights, chart_paths, company_name)
+    def get_template(self):
+        """取已编译的信息图模板（进程内按模板源码缓存）"""
         if Template is None:
             raise ModuleNotFoundError("缺少 jinja2 依赖，请先执行 pip install -r requirements.txt")
-        template = Template(self.create_html_template())
-        return template.render(**context)
+        source = self.create_html_template()
+        template = _TEMPLATE_CACHE.get(source)
+        if template is None:
+            # 经加载器取模板才会用到字节码缓存：按源码校验和跨进程复用编译结果，模板改动后自动失效
+            env = Environment(
+                loader=DictLoader({_TEMPLATE_NAME: _minify_template(source) if _MINIFY_TEMPLATE else source}),
+                bytecode_cache=_bytecode_cache(),
+                auto_reload=False,
+                # 列名、类别值、公司名等都来自用户数据或命令行，所有变量渲染时统一转义
+                autoescape=True,
+            )
+            template = _TEMPLATE_CACHE[source] = env.get_template(_TEMPLATE_NAME)
+        return template
+
+    def generate_infographic_html(self, analysis_results, chart_paths, insights, company_name='', generation_time=None):
+        """生成信息图HTML文本"""
+        context = self.build_context(analysis_results, insights, chart_paths, company_name, generation_time)
+        return self.get_template().render(**context)
+
+    def render_to_file(self, analysis_results, chart_paths, insights, company_name='', filename=None,
+                       generation_time=None):
+        """渲染信息图并边渲染边写入文件（不在内存中拼出整份HTML），返回文件路径"""
+        context = self.build_context(analysis_results, insights, chart_paths, company_name, generation_time)
+        filepath = self.resolve_output_path(filename)
+        self.get_template().stream(**context).dump(filepath, encoding='utf-8')
+        return filepath
 
-    def save_infographic(self, html_content, filename=None):
-        """保存HTML到文件"""
+    def generate_many(self, jobs):
+        """
+        批量渲染信息图并写入文件，整批共用同一生成时间与模板
+
+        Args:
+            jobs: [{'analysis_results', 'chart_paths', 'insights', 'company_name', 'filename'}, ...]，
+                后两项可省略；未给 filename 的按 market_analysis_infographic_<时间戳>_<序号> 命名
+
+        Returns:
+            list: 与 jobs 顺序一致的文件路径
+        """
+        template = self.get_template()
+        now = datetime.now()
+        generation_time = now.strftime('%Y-%m-%d %H:%M')
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        # 上下文（含上下文缓存与图片编码）在当前线程依次构建；只有模板渲染与写盘交给线程池，
+        # 工作线程只读各自的上下文，不访问生成器的缓存
+        tasks = [
+            (
+                self.build_context(job['analysis_results'], job.get('insights'), job.get('chart_paths'),
+                                   job.get('company_name', ''), generation_time),
+                self.resolve_output_path(job.get('filename') or f"market_analysis_infographic_{timestamp}_{index + 1}"),
+            )
+            for index, job in enumerate(jobs)
+        ]
+
+        def render(task):
+            context, filepath = task
+            template.stream(**context).dump(filepath, encoding='utf-8')
+            return filepath
+
+        if len(tasks) <= 1:
+            return [render(task) for task in tasks]
+        with ThreadPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+            return list(pool.map(render, tasks))
+
+    def resolve_output_path(self, filename=None):
+        """信息图HTML的输出路径"""
         if not filename:
             filename = "market_analysis_infographic"
-        filepath = os.path.join(self.output_dir, f"{filename}.html")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        return os.path.join(self.output_dir, f"{filename}.html")
+
+    def save_infographic(self, html_content, filename=None):
+        """保存HTML到文件"""
+        filepath = self.resolve_output_path(filename)
+        # 整体编码一次后以二进制写入，不经文本层逐块编码
+        with open(filepath, 'wb') as f:
+            f.write(html_content.encode('utf-8'))
         return filepath
 
     def create_html_template(self):
@@ -433,7 +747,7 @@ class InfographicGenerator:
             {% for item in chart_images %}
             <div class="card" style="margin-bottom:12px;">
                 <div class="label">{{ item.title }}</div>
-                <img src="{{ item.dataurl }}" alt="{{ item.title }}" style="max-width:100%; border-radius:6px; border:1px solid var(--border);" />
+                <img src="{{ item.dataurl }}" loading="lazy" decoding="async" alt="{{ item.title }}" style="max-width:100%; border-radius:6px; border:1px solid var(--border);" />
             </div>
             {% endfor %}
         </div>
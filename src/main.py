@@ -5,26 +5,154 @@
 整合所有模块，实现完整的业务洞察分析包生成流程
 """
 
+import io
 import os
 import sys
 import json
 import argparse
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from docx.oxml.ns import qn
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
 
 # 导入自定义模块
 from data_analyzer import DataAnalyzer
 from chart_generator import ChartGenerator
 from infographic_generator import InfographicGenerator
 from screenshot_generator import ScreenshotGenerator
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ModuleNotFoundError:
+    pa = None
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+# 行数达到该值的表改用 pyarrow 写 CSV（C++ 列式写出；数值/布尔的文本格式与 pandas 略有差异，小表仍走 pandas）
+_ARROW_CSV_MIN_ROWS = 100_000
+# 输出根目录下的子目录（父目录在前）
+_OUTPUT_SUBDIRS = ('csv', 'excel', 'figures', 'figures/png', 'figures/svg', 'reports', 'html')
+# 自动检测数据文件时识别的扩展名
+_DATA_FILE_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+# 名单中视为缺失的占位写法（比较前先转小写）
+_MISSING_NAME_TOKENS = frozenset({'nan', 'none', 'null', 'na', 'n/a'})
+# export_data 导出的分析结果表，按导出顺序
+_EXPORT_KEYS = (
+    '字段概览', '数值列统计', '分类分布', '相关性矩阵',
+    '时间趋势', '核心维度分布', '城市分布', '渠道分布',
+    '城市品牌分布', '城市Top3', '城市白区', '机会优先级_城市',
+    '机会城市', '渠道白区', '机会优先级_渠道', '重点实体白区',
+    '机会优先级_重点实体', '目录分布', '大类分布', '产品结构',
+    '覆盖分析', '重点实体TOP', '产品分布', '品牌产品分布',
+    '城市产品分布', '品牌产品Top',
+    # 兼容旧版输出键，避免依赖旧文件名的链路立刻失效
+    '机会医院', '医院TOP', '医院白院', '机会优先级_医院',
+)
+# 不进入 Excel 汇总表的导出项
+_EXCEL_EXCLUDE_KEYS = frozenset({'字段概览', '数值列统计'})
+# charts_mode='auto' 时判定图表有可视价值的条件：(分析结果键, 判定)，开销小的在前
+_CHART_VALUE_CHECKS = (
+    ('相关性矩阵', lambda v: v is not None),
+    ('数值列统计', lambda v: v is not None and len(v.index) > 1),
+    ('时间趋势', lambda v: v is not None and len(v.index) > 2),
+    ('品牌份额', lambda v: v is not None and len(v.index) > 0),
+    ('机会城市', lambda v: v is not None and len(v.index) > 0),
+    ('覆盖分析', lambda v: v is not None and len(v.index) > 0),
+    ('产品结构', lambda v: v is not None and len(v.index) > 0),
+    ('分类分布', lambda v: v is not None and len(v.index) > 0 and v['数量'].max() > 1),
+)
+# 市场叙事摘要各段的语句规则：(判定, 模板)，按顺序拼接满足判定的语句，模板按叙事状态填充
+_NARRATIVE_CURRENT_RULES = (
+    (lambda st: st['has_concentration'],
+     "当前{metric_label}主要由少数头部{dim_label}驱动，Top1约{top1:.1f}%，Top3约{top3:.1f}%。"),
+    (lambda st: not st['has_concentration'],
+     "当前{metric_label}已出现明显头部与长尾分层，资源投入需要做优先级。"),
+    (lambda st: st['head'], " 头部代表包括{head}。"),
+)
+_NARRATIVE_OPPORTUNITY_RULES = (
+    (lambda st: st['top3'] >= 60, "头部{dim_label}是短期放量的直接抓手"),
+    (lambda st: st['tail'], "长尾中的{tail}适合作为低成本试点"),
+)
+_NARRATIVE_WHY_RULES = (
+    (lambda st: True, "这样做可以在不显著增加团队负担的情况下，把资源集中到最可能产生结果的对象上"),
+    (lambda st: st['top3'] >= 60, "同时避免资源被低转化长尾平均摊薄"),
+    (lambda st: not st['has_time'], "在缺少时间序列时，结构与覆盖策略比趋势判断更稳妥"),
+)
+_NARRATIVE_RISK_RULES = (
+    (lambda st: not st['has_time'], "缺少时间维度，短期效果评估可能滞后"),
+    (lambda st: not st['has_price'], "缺少价格维度，价格带策略判断存在盲区"),
+    (lambda st: not st['has_structure'], "缺少稳定结构字段，替代路径判断可能偏粗"),
+    (lambda st: st['top3'] >= 70, "头部集中度较高，单一对象波动会放大整体不确定性"),
+)
+_NARRATIVE_STRATEGY = "建议采用“头部深耕 + 白区试点”的双线策略：对头部{dim_label}做份额提升，对低份额高潜对象做定点突破。"
+_NARRATIVE_BENEFIT = "预期收益是：更快形成可见增量、提升重点{dim_label}转化效率，并沉淀可复制打法扩展到相似对象。"
+_NARRATIVE_MITIGATION = "建议建立周节奏复盘：按对象跟踪进展、补齐关键字段（时间/价格/结构）、设置止损阈值并及时调整资源。"
+# Word 报告嵌入的图表：(chart_paths 键, 标题模板)，按展示顺序；{dim}/{metric} 为核心维度与指标
+_REPORT_FIGURES = (
+    ('core_share', "{dim} 份额（按{metric}）"),
+    ('city_share', "城市分布（按量）"),
+    ('category_share', "目录份额"),
+    ('major_share', "产品大类分布"),
+    ('coverage', "{dim} 覆盖与单实体均量"),
+    ('city_opportunities', "机会城市（如有）"),
+    ('product_structure', "产品结构（如有）"),
+    ('time_trend', "时间趋势（如有）"),
+    ('correlation_heatmap', "相关性（如有）"),
+)
+# 命令行参数中原样写入流水线配置的项（参数名与配置键相同，未提供时不写入）
+_CONFIG_ARGS = ('time_column', 'value_column', 'output_dir', 'charts_mode', 'core_dimension', 'target_brand',
+                'chart_workers')
+# 图表汇总页的固定页头
+_GALLERY_HEAD = """<!DOCTYPE html>
+<html lang='zh-CN'>
+<head>
+<meta charset='UTF-8' />
+<title>图表汇总</title>
+<style>
+body { font-family: Arial, sans-serif; margin: 24px; background: #f7f7f7; }
+h1 { margin-bottom: 12px; }
+.card { background: #fff; padding: 16px; margin-bottom: 16px; box-shadow: 0 2px 6px rgba(0,0,0,0.08); border-radius: 8px; }
+.card h2 { margin: 0 0 8px 0; font-size: 18px; }
+.card img { max-width: 100%; height: auto; border: 1px solid #e5e5e5; border-radius: 4px; }
+</style>
+</head>
+<body>
+<h1>图表汇总</h1>
+"""
+
+
+def _write_csv(task):
+    """导出单张CSV（带 BOM 便于 Excel 直接打开），返回文件路径"""
+    filepath, data = task
+    if pa is not None and len(data) >= _ARROW_CSV_MIN_ROWS:
+        try:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            with open(filepath, 'wb') as f:
+                f.write(b'\xef\xbb\xbf')
+                pa_csv.write_csv(table, f, write_options=pa_csv.WriteOptions(quoting_style='needed'))
+            return filepath
+        except (pa.ArrowException, TypeError, ValueError):
+            # 含无法转换为 Arrow 的对象列时退回 pandas
+            pass
+    data.to_csv(filepath, index=False, encoding='utf-8-sig')
+    return filepath
+
+
+def _numeric_stat_range(numeric_stats, metric):
+    """数值列统计中某字段的 (最小值, 最大值)，只扫描一遍字段列；表为空或无该字段时返回 None"""
+    if numeric_stats is None or numeric_stats.empty or not metric:
+        return None
+    pos = np.flatnonzero(numeric_stats['字段'].to_numpy() == metric)
+    if pos.size == 0:
+        return None
+    return numeric_stats['最小值'].iat[pos[0]], numeric_stats['最大值'].iat[pos[0]]
+
 
 class DataAnalysisPipeline:
     """数据分析流水线"""
@@ -62,17 +190,10 @@ class DataAnalysisPipeline:
         """设置输出目录"""
         if self.output_root is None:
             raise ValueError("output_root 未初始化")
-        directories = [
-            self.output_root / 'csv',
-            self.output_root / 'excel',
-            self.output_root / 'figures' / 'png',
-            self.output_root / 'figures' / 'svg',
-            self.output_root / 'reports',
-            self.output_root / 'html'
-        ]
-
-        for directory in directories:
-            os.makedirs(directory, exist_ok=True)
+        # 根目录按需逐级创建一次，子目录按父目录在前的顺序逐个创建，不再逐级回溯检查共同祖先
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        for subdir in _OUTPUT_SUBDIRS:
+            (self.output_root / subdir).mkdir(exist_ok=True)
 
     def init_generators(self):
         """基于输出目录初始化依赖组件"""
@@ -102,32 +223,8 @@ class DataAnalysisPipeline:
             return True
 
         # auto: 判定是否有可视价值
-        numeric = analysis_results.get('数值列统计')
-        cat = analysis_results.get('分类分布')
-        corr = analysis_results.get('相关性矩阵')
-        trend = analysis_results.get('时间趋势')
-        brand = analysis_results.get('品牌份额')
-        city = analysis_results.get('机会城市')
-        coverage = analysis_results.get('覆盖分析')
-        structure = analysis_results.get('产品结构')
-
-        if numeric is not None and len(numeric) > 1:
-            return True
-        if cat is not None and not cat.empty and cat['数量'].max() > 1:
-            return True
-        if corr is not None:
-            return True
-        if trend is not None and not trend.empty and len(trend) > 2:
-            return True
-        if brand is not None and not brand.empty:
-            return True
-        if city is not None and not city.empty:
-            return True
-        if coverage is not None and not coverage.empty:
-            return True
-        if structure is not None and not structure.empty:
-            return True
-        return False
+        get = analysis_results.get
+        return any(check(get(key)) for key, check in _CHART_VALUE_CHECKS)
 
     def detect_data_files(self, data_dir='data'):
         """
@@ -139,16 +236,12 @@ class DataAnalysisPipeline:
         Returns:
             list: 数据文件列表
         """
-        data_files = []
-        supported_extensions = ['.csv', '.xlsx', '.xls']
-
-        if os.path.exists(data_dir):
-            for file in os.listdir(data_dir):
-                if any(file.endswith(ext) for ext in supported_extensions):
-                    file_path = os.path.join(data_dir, file)
-                    data_files.append(file_path)
-
-        return data_files
+        # 目录不存在或不是目录时返回空列表
+        try:
+            with os.scandir(data_dir) as it:
+                return [entry.path for entry in it if entry.name.endswith(_DATA_FILE_EXTENSIONS) and entry.is_file()]
+        except OSError:
+            return []
 
     def build_market_narrative(
         self,
@@ -164,72 +257,33 @@ class DataAnalysisPipeline:
         """
         生成面向市场团队的叙事化摘要，避免学术统计口吻。
         """
-        head = "、".join([str(x) for x in head_names[:3]]) if head_names else ""
-        tail = "、".join([str(x) for x in tail_names[:3]]) if tail_names else ""
-
-        if concentration:
-            top3 = concentration.get("Top3占比", 0.0)
-            top1 = concentration.get("Top1占比", 0.0)
-            current = (
-                f"当前{metric_label}主要由少数头部{dim_label}驱动，Top1约{top1:.1f}%，Top3约{top3:.1f}%。"
-            )
-        else:
-            top3 = 0.0
-            current = f"当前{metric_label}已出现明显头部与长尾分层，资源投入需要做优先级。"
-
-        if head:
-            current += f" 头部代表包括{head}。"
-
-        opportunity = []
-        if top3 >= 60:
-            opportunity.append(f"头部{dim_label}是短期放量的直接抓手")
-        if tail:
-            opportunity.append(f"长尾中的{tail}适合作为低成本试点")
-        if not opportunity:
-            opportunity.append("可从覆盖不足和份额偏低的对象中筛选突破口")
-        opportunity_text = "；".join(opportunity) + "。"
-
-        strategy = (
-            f"建议采用“头部深耕 + 白区试点”的双线策略：对头部{dim_label}做份额提升，对低份额高潜对象做定点突破。"
-        )
-
-        why = []
-        why.append("这样做可以在不显著增加团队负担的情况下，把资源集中到最可能产生结果的对象上")
-        if top3 >= 60:
-            why.append("同时避免资源被低转化长尾平均摊薄")
-        if not has_time:
-            why.append("在缺少时间序列时，结构与覆盖策略比趋势判断更稳妥")
-        why_text = "；".join(why) + "。"
-
-        benefit = (
-            f"预期收益是：更快形成可见增量、提升重点{dim_label}转化效率，并沉淀可复制打法扩展到相似对象。"
-        )
+        state = {
+            'dim_label': dim_label,
+            'metric_label': metric_label,
+            'head': "、".join(map(str, head_names[:3])) if head_names else "",
+            'tail': "、".join(map(str, tail_names[:3])) if tail_names else "",
+            'top1': concentration.get("Top1占比", 0.0) if concentration else 0.0,
+            'top3': concentration.get("Top3占比", 0.0) if concentration else 0.0,
+            'has_concentration': bool(concentration),
+            'has_time': has_time,
+            'has_price': has_price,
+            'has_structure': has_structure,
+        }
 
-        risks = []
-        if not has_time:
-            risks.append("缺少时间维度，短期效果评估可能滞后")
-        if not has_price:
-            risks.append("缺少价格维度，价格带策略判断存在盲区")
-        if not has_structure:
-            risks.append("缺少稳定结构字段，替代路径判断可能偏粗")
-        if top3 >= 70:
-            risks.append("头部集中度较高，单一对象波动会放大整体不确定性")
-        if not risks:
-            risks.append("当前主要风险来自执行节奏不一致")
-        risk_text = "；".join(risks) + "。"
-
-        mitigation = (
-            "建议建立周节奏复盘：按对象跟踪进展、补齐关键字段（时间/价格/结构）、设置止损阈值并及时调整资源。"
-        )
+        def compose(rules, fallback=None, sep="；", end="。"):
+            parts = [template.format_map(state) for pred, template in rules if pred(state)]
+            if not parts and fallback:
+                parts = [fallback]
+            return sep.join(parts) + end
 
         return {
-            "现状判断": current,
-            "机会判断": opportunity_text,
-            "策略建议": strategy,
-            "为何现在做": why_text,
-            "预期收益": benefit,
-            "主要风险": risk_text,
-            "风险对策": mitigation,
+            "现状判断": compose(_NARRATIVE_CURRENT_RULES, sep="", end=""),
+            "机会判断": compose(_NARRATIVE_OPPORTUNITY_RULES, "可从覆盖不足和份额偏低的对象中筛选突破口"),
+            "策略建议": _NARRATIVE_STRATEGY.format_map(state),
+            "为何现在做": compose(_NARRATIVE_WHY_RULES),
+            "预期收益": _NARRATIVE_BENEFIT.format_map(state),
+            "主要风险": compose(_NARRATIVE_RISK_RULES, "当前主要风险来自执行节奏不一致"),
+            "风险对策": _NARRATIVE_MITIGATION,
         }
 
     def humanize_dimension_label(self, column_name):
@@ -402,8 +456,9 @@ class DataAnalysisPipeline:
         blueprint = self.build_strategic_report_blueprint(df_filtered, analysis_results)
         insights = self.build_strategic_insights(analysis_results, blueprint)
 
+        # 原始数据下游不再使用（原始记录数已在体检报告的基本信息中），不随结果返回，
+        # 过滤得到子集时原表可随本函数返回释放
         return {
-            'raw_data': df,
             'filtered_data': df_filtered,
             'health_report': health_report,
             'analysis_results': analysis_results,
@@ -423,7 +478,8 @@ class DataAnalysisPipeline:
         """
         print("开始生成图表...")
         chart_paths = self.chart_generator.generate_all_charts(
-            analysis_results, company_name=company_name or ''
+            analysis_results, company_name=company_name or '',
+            max_workers=self.config.get('chart_workers', 1)
         )
         print(f"图表生成完成，共{len(chart_paths)}个图表")
         return chart_paths
@@ -436,6 +492,10 @@ class DataAnalysisPipeline:
             analysis_results: 分析结果
             insights: 洞察分析
         """
+        # openpyxl 只在导出时用到，按需导入以缩短启动时间
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+
         print("开始导出数据...")
 
         def make_json_safe(value):
@@ -452,83 +512,62 @@ class DataAnalysisPipeline:
             return value
 
         csv_dir = self.output_root / 'csv'
+        # 只取一次、只判一次空，CSV 与 Excel 共用同一份导出列表
+        exports = []
+        for name in _EXPORT_KEYS:
+            data = analysis_results.get(name)
+            if data is not None and len(data.index) > 0:
+                exports.append((name, data))
+
         # 导出CSV文件
-        csv_exports = {
-            '字段概览': analysis_results.get('字段概览'),
-            '数值列统计': analysis_results.get('数值列统计'),
-            '分类分布': analysis_results.get('分类分布'),
-            '相关性矩阵': analysis_results.get('相关性矩阵'),
-            '时间趋势': analysis_results.get('时间趋势'),
-            '核心维度分布': analysis_results.get('核心维度分布'),
-            '城市分布': analysis_results.get('城市分布'),
-            '渠道分布': analysis_results.get('渠道分布'),
-            '城市品牌分布': analysis_results.get('城市品牌分布'),
-            '城市Top3': analysis_results.get('城市Top3'),
-            '城市白区': analysis_results.get('城市白区'),
-            '机会优先级_城市': analysis_results.get('机会优先级_城市'),
-            '机会城市': analysis_results.get('机会城市'),
-            '渠道白区': analysis_results.get('渠道白区'),
-            '机会优先级_渠道': analysis_results.get('机会优先级_渠道'),
-            '重点实体白区': analysis_results.get('重点实体白区'),
-            '机会优先级_重点实体': analysis_results.get('机会优先级_重点实体'),
-            '目录分布': analysis_results.get('目录分布'),
-            '大类分布': analysis_results.get('大类分布'),
-            '产品结构': analysis_results.get('产品结构'),
-            '覆盖分析': analysis_results.get('覆盖分析'),
-            '重点实体TOP': analysis_results.get('重点实体TOP'),
-            '产品分布': analysis_results.get('产品分布'),
-            '品牌产品分布': analysis_results.get('品牌产品分布'),
-            '城市产品分布': analysis_results.get('城市产品分布'),
-            '品牌产品Top': analysis_results.get('品牌产品Top'),
-            # 兼容旧版输出键，避免依赖旧文件名的链路立刻失效
-            '机会医院': analysis_results.get('机会医院'),
-            '医院TOP': analysis_results.get('医院TOP'),
-            '医院白院': analysis_results.get('医院白院'),
-            '机会优先级_医院': analysis_results.get('机会优先级_医院')
-        }
-
-        for name, data in csv_exports.items():
-            if data is not None and not data.empty:
-                filepath = csv_dir / f"{name}.csv"
-                data.to_csv(filepath, index=False, encoding='utf-8-sig')
-                print(f"导出CSV: {filepath}")
+        csv_tasks = [(csv_dir / f"{name}.csv", data) for name, data in exports]
+        # 各表相互独立，多线程并行格式化与写盘（线程间共享表对象，无需序列化传给子进程）
+        if len(csv_tasks) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(csv_tasks), os.cpu_count() or 1)) as pool:
+                written = list(pool.map(_write_csv, csv_tasks))
+        else:
+            written = [_write_csv(task) for task in csv_tasks]
+        for filepath in written:
+            print(f"导出CSV: {filepath}")
 
         # 导出Excel汇总表（带目录，移除字段概览/数值统计）
         excel_path = self.output_root / "excel/数据分析汇总.xlsx"
-        wb = Workbook()
-        toc = wb.active
-        toc.title = "目录"
-        toc.append(["名称", "跳转"])
-
-        def add_toc_row(name):
-            row = toc.max_row + 1
-            toc.cell(row=row, column=1, value=name)
-            cell = toc.cell(row=row, column=2, value="点击跳转")
-            cell.hyperlink = f"#{name}!A1"
+        # 只写模式逐行流式写出，不在内存中保留整张单元格网格
+        wb = Workbook(write_only=True)
+        def link_cell(ws, value, target):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.hyperlink = target
             cell.style = "Hyperlink"
+            return cell
 
-        exclude_excel = {"字段概览", "数值列统计"}
-        for name, data in csv_exports.items():
-            if name in exclude_excel or data is None or data.empty:
+        sheet_names = []
+        for name, data in exports:
+            if name in _EXCEL_EXCLUDE_KEYS:
                 continue
             ws = wb.create_sheet(name)
-            for r in dataframe_to_rows(data, index=False, header=True):
-                ws.append(r)
-            add_toc_row(name)
-            back = ws.cell(row=ws.max_row + 2, column=1)
-            back.value = "返回目录"
-            back.hyperlink = "#目录!A1"
-            back.style = "Hyperlink"
-
-        if "Sheet" in wb.sheetnames:
-            wb.remove(wb["Sheet"])
+            ws.append(list(data.columns))
+            for row in data.itertuples(index=False, name=None):
+                ws.append(row)
+            ws.append([])
+            ws.append([link_cell(ws, "返回目录", "#目录!A1")])
+            sheet_names.append(name)
+
+        # 目录页最后生成、放在首位
+        toc = wb.create_sheet("目录", 0)
+        toc.append(["名称", "跳转"])
+        for name in sheet_names:
+            toc.append([name, link_cell(toc, "点击跳转", f"#{name}!A1")])
         wb.save(excel_path)
         print(f"导出Excel: {excel_path}")
 
         # 导出洞察分析
         insights_path = self.output_root / "reports/洞察分析.json"
-        with open(insights_path, 'w', encoding='utf-8') as f:
-            json.dump(make_json_safe(insights), f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            # 原生 UTF-8 编码，缩进格式与标准库输出一致
+            insights_path.write_bytes(orjson.dumps(make_json_safe(insights), option=orjson.OPT_INDENT_2))
+        else:
+            with open(insights_path, 'w', encoding='utf-8') as f:
+                json.dump(make_json_safe(insights), f, ensure_ascii=False, indent=2)
         print(f"导出洞察: {insights_path}")
 
     def generate_infographic(self, analysis_results, chart_paths, insights, company_name=None):
@@ -545,11 +584,9 @@ class DataAnalysisPipeline:
             str: HTML文件路径
         """
         print("生成信息图HTML...")
-        html_content = self.infographic_generator.generate_infographic_html(
+        html_path = self.infographic_generator.render_to_file(
             analysis_results, chart_paths, insights, company_name
         )
-
-        html_path = self.infographic_generator.save_infographic(html_content)
         print(f"信息图HTML已生成: {html_path}")
         return html_path
 
@@ -558,9 +595,11 @@ class DataAnalysisPipeline:
         if not self.config.get('enable_screenshot') or not self.screenshot_generator:
             return None
         print("生成截图...")
-        screenshot_path = self.screenshot_generator.generate_screenshot_sync(
-            html_path, output_name
-        )
+        # 每次运行只截一张图，截完即关闭浏览器与后台事件循环
+        with self.screenshot_generator:
+            screenshot_path = self.screenshot_generator.generate_screenshot_sync(
+                html_path, output_name
+            )
         print(f"截图已生成: {screenshot_path}")
         return screenshot_path
 
@@ -584,57 +623,44 @@ class DataAnalysisPipeline:
             'numeric_overview': '数值概览',
         }
         items = []
-        from pathlib import Path
         for key, val in chart_paths.items():
             png = None
             if isinstance(val, dict):
                 png = val.get('png')
             elif isinstance(val, (list, tuple)) and len(val) > 0:
                 png = val[0]
-            if png and Path(png).exists():
+            if png:
                 items.append((mapping.get(key, key), png))
         if not items:
             return None
 
-        html_parts = [
-            "<!DOCTYPE html>",
-            "<html lang='zh-CN'>",
-            "<head>",
-            "<meta charset='UTF-8' />",
-            "<title>图表汇总</title>",
-            "<style>",
-            "body { font-family: Arial, sans-serif; margin: 24px; background: #f7f7f7; }",
-            "h1 { margin-bottom: 12px; }",
-            ".card { background: #fff; padding: 16px; margin-bottom: 16px; box-shadow: 0 2px 6px rgba(0,0,0,0.08); border-radius: 8px; }",
-            ".card h2 { margin: 0 0 8px 0; font-size: 18px; }",
-            ".card img { max-width: 100%; height: auto; border: 1px solid #e5e5e5; border-radius: 4px; }",
-            "</style>",
-            "</head>",
-            "<body>",
-            "<h1>图表汇总</h1>",
-        ]
-        for title, png in items:
-            html_parts.append("<div class='card'>")
-            html_parts.append(f"<h2>{title}</h2>")
-            html_parts.append(f"<img src='file://{png}' alt='{title}' />")
-            html_parts.append("</div>")
-        html_parts.append("</body></html>")
+        # 图片按信息图同样的策略内嵌为 data URL（过大的复制到 HTML 旁按相对路径引用），
+        # 页面移动后仍可打开；与信息图共用编码缓存，各图读盘编码并行
+        images = self.infographic_generator or InfographicGenerator(output_dir=str(html_dir))
+        with ThreadPoolExecutor(max_workers=min(len(items), 4)) as pool:
+            sources = list(pool.map(lambda item: images.image_src(item[1]), items))
+        # 读取失败的图返回空串，直接跳过
+        cards = [(title, src) for (title, _), src in zip(items, sources) if src]
+        if not cards:
+            return None
+
+        buf = io.StringIO()
+        buf.write(_GALLERY_HEAD)
+        for title, src in cards:
+            buf.write(f"<div class='card'>\n<h2>{title}</h2>\n<img src='{src}' alt='{title}' />\n</div>\n")
+        buf.write("</body></html>")
         out_path = html_dir / "charts_gallery.html"
-        out_path.write_text("\n".join(html_parts), encoding="utf-8")
+        out_path.write_text(buf.getvalue(), encoding="utf-8")
         print(f"图表汇总已生成: {out_path}")
         return str(out_path)
 
     def format_entities(self, names, max_n=5):
         """格式化实体名称列表。"""
-        cleaned = [
-            str(n).strip()
-            for n in names
-            if pd.notna(n) and str(n).strip() and str(n).strip().lower() not in {'nan', 'none', 'null', 'na', 'n/a'}
-        ]
-        if not cleaned:
+        cleaned = pd.Series(names, dtype=object).dropna().astype(str).str.strip()
+        cleaned = cleaned[(cleaned != '') & ~cleaned.str.lower().isin(_MISSING_NAME_TOKENS)]
+        if cleaned.empty:
             return ""
-        subset = cleaned[:max_n]
-        return "、".join(subset) + (" 等" if len(cleaned) > max_n else "")
+        return "、".join(cleaned.head(max_n)) + (" 等" if len(cleaned) > max_n else "")
 
     def _pick_entity_priority(self, analysis_results):
         entity_priority = analysis_results.get('机会优先级_重点实体')
@@ -719,11 +745,10 @@ class DataAnalysisPipeline:
             if start_v is not None and end_v is not None and trend_direction:
                 time_trend_summary = f"整体时间趋势呈{trend_direction}态势（{start_v:,.1f} -> {end_v:,.1f}）"
 
-        numeric_stats = analysis_results.get('数值列统计')
+        metric_range = _numeric_stat_range(analysis_results.get('数值列统计'), core_metric)
         core_metric_range = None
-        if numeric_stats is not None and not numeric_stats.empty and core_metric in numeric_stats['字段'].values:
-            row = numeric_stats[numeric_stats['字段'] == core_metric].iloc[0]
-            core_metric_range = f"{core_metric}的区间大致在 {row['最小值']:,.2f} 到 {row['最大值']:,.2f}"
+        if metric_range is not None:
+            core_metric_range = f"{core_metric}的区间大致在 {metric_range[0]:,.2f} 到 {metric_range[1]:,.2f}"
 
         missing_fields = self.detect_missing_capabilities(filtered_df, price_col=price_col)
 
@@ -1017,20 +1042,26 @@ class DataAnalysisPipeline:
             'channel': [],
             'entity': []
         }
+
+        def head_rows(frame, n=3):
+            # 前 n 行按 {列名: 值} 逐行给出，走 itertuples 不为每行构造 Series
+            columns = frame.columns.tolist()
+            return [dict(zip(columns, values)) for values in frame.head(n).itertuples(index=False, name=None)]
+
         if city_priority is not None and not city_priority.empty and '城市' in city_priority.columns:
-            for _, row in city_priority.head(3).iterrows():
+            for row in head_rows(city_priority):
                 priority_focus['city'].append(
                     f"{row['城市']}：综合分 {float(row.get('综合优先级分', 0.0)):.1f}，当前份额 {float(row.get('目标品牌份额(%)', 0.0)):.1f}%，容量 {float(row.get('城市总量', 0.0)):.0f}。"
                 )
         if channel_priority is not None and not channel_priority.empty:
             name_col = next((cand for cand in ['渠道', '渠道名称', '销售渠道', '渠道类型'] if cand in channel_priority.columns), None)
             if name_col:
-                for _, row in channel_priority.head(3).iterrows():
+                for row in head_rows(channel_priority):
                     priority_focus['channel'].append(
                         f"{row[name_col]}：综合分 {float(row.get('综合优先级分', 0.0)):.1f}，当前份额 {float(row.get('目标品牌份额(%)', 0.0)):.1f}%，容量 {float(row.get('渠道总量', 0.0)):.0f}。"
                     )
         if entity_priority is not None and not entity_priority.empty and entity_name_col:
-            for _, row in entity_priority.head(3).iterrows():
+            for row in head_rows(entity_priority):
                 priority_focus['entity'].append(
                     f"{row.get(entity_name_col, '重点实体')}：综合分 {float(row.get('综合优先级分', 0.0)):.1f}，当前份额 {float(row.get('目标品牌份额(%)', 0.0)):.1f}%，容量 {float(row.get(entity_total_col, 0.0)):.0f}。"
                 )
@@ -1114,6 +1145,11 @@ class DataAnalysisPipeline:
         """
         生成图文并茂的Word报告（轻量版，聚焦核心结论）
         """
+        # python-docx 只在生成报告时用到，按需导入以缩短启动时间
+        from docx import Document
+        from docx.oxml.ns import qn
+        from docx.shared import Inches
+
         report_dir = self.output_root / 'reports'
         report_dir.mkdir(parents=True, exist_ok=True)
 
@@ -1203,35 +1239,42 @@ class DataAnalysisPipeline:
                 doc.add_paragraph(
                     f"集中度参考：Top1 {concentration['Top1占比']:.1f}% / Top3 {concentration['Top3占比']:.1f}% / Top5 {concentration['Top5占比']:.1f}%。"
                 )
-            if core_metric in numeric_stats['字段'].values:
-                row = numeric_stats[numeric_stats['字段'] == core_metric].iloc[0]
+            metric_range = _numeric_stat_range(numeric_stats, core_metric)
+            if metric_range is not None:
                 doc.add_paragraph(
-                    f"{core_metric}取值区间约为 {row['最小值']:,.2f} 到 {row['最大值']:,.2f}，说明不同对象体量差异较大，需要分层运营。"
+                    f"{core_metric}取值区间约为 {metric_range[0]:,.2f} 到 {metric_range[1]:,.2f}，说明不同对象体量差异较大，需要分层运营。"
                 )
 
         # 嵌入图表（业务优先）
         if chart_paths:
             doc.add_heading('图表', level=1)
-            def add_fig(key, caption):
+            figures = []
+            caption_values = {'dim': display_dim_label, 'metric': core_metric or '指标'}
+            for key, caption in _REPORT_FIGURES:
                 path_info = chart_paths.get(key)
                 if isinstance(path_info, dict):
                     png = path_info.get('png')
-                elif isinstance(path_info, (list, tuple)):
+                elif isinstance(path_info, (list, tuple)) and len(path_info) > 0:
                     png = path_info[0]
                 else:
                     png = None
                 if png:
+                    figures.append((caption.format_map(caption_values), str(png)))
+            # 每个图表目录只列一次，缺失的图跳过，同一张图只嵌入一次
+            existing = set()
+            for folder in {os.path.dirname(png) or '.' for _, png in figures}:
+                try:
+                    with os.scandir(folder) as it:
+                        existing.update(os.path.join(folder, e.name) for e in it if e.is_file())
+                except OSError:
+                    pass
+            added = set()
+            for caption, png in figures:
+                key = os.path.join(os.path.dirname(png) or '.', os.path.basename(png))
+                if key in existing and key not in added:
+                    added.add(key)
                     doc.add_paragraph(caption)
-                    doc.add_picture(str(png), width=Inches(6.5))
-            add_fig('core_share', f"{display_dim_label} 份额（按{core_metric or '指标'}）")
-            add_fig('city_share', "城市分布（按量）")
-            add_fig('category_share', "目录份额")
-            add_fig('major_share', "产品大类分布")
-            add_fig('coverage', f"{display_dim_label} 覆盖与单实体均量")
-            add_fig('city_opportunities', "机会城市（如有）")
-            add_fig('product_structure', "产品结构（如有）")
-            add_fig('time_trend', "时间趋势（如有）")
-            add_fig('correlation_heatmap', "相关性（如有）")
+                    doc.add_picture(png, width=Inches(6.5))
 
         invalid_chars = '<>:"/\\|?*'
         report_name = "".join('_' if ch in invalid_chars else ch for ch in report_title.replace(' ', '_')).strip(' .')
@@ -1277,26 +1320,31 @@ class DataAnalysisPipeline:
             # 3. 导出数据
             self.export_data(analysis_data['analysis_results'], analysis_data['insights'])
 
-            # 4. 生成信息图（如启用图表则包含图片，否则空白图表区）
-            html_path = self.generate_infographic(
-                analysis_data['analysis_results'],
-                chart_paths,
-                analysis_data['insights'],
-                company_name
-            )
+            # Word 报告写独立文件，放到后台线程与 HTML 生成重叠执行；
+            # 信息图/汇总页（共用编码缓存）留在当前线程依次执行
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                # 6. 生成Word报告（聚焦核心结论；只依赖分析结果与图表，与 HTML 生成并行）
+                report_title = Path(data_path).stem + "_分析报告"
+                report_future = pool.submit(self.generate_word_report, analysis_data, chart_paths, report_title)
+
+                # 4. 生成信息图（如启用图表则包含图片，否则空白图表区）
+                html_path = self.generate_infographic(
+                    analysis_data['analysis_results'],
+                    chart_paths,
+                    analysis_data['insights'],
+                    company_name
+                )
 
-            # 4b. 生成图表汇总 HTML（便于快速预览/分发）
-            gallery_path = self.create_chart_gallery(chart_paths)
+                # 4b. 生成图表汇总 HTML（便于快速预览/分发）
+                gallery_path = self.create_chart_gallery(chart_paths)
 
-            # 5. 生成截图（默认关闭）
-            screenshot_path = None
-            if self.config.get('enable_screenshot'):
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                screenshot_path = self.generate_screenshot(html_path, f"analysis_{timestamp}")
+                # 5. 生成截图（默认关闭）
+                screenshot_path = None
+                if self.config.get('enable_screenshot'):
+                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                    screenshot_path = self.generate_screenshot(html_path, f"analysis_{timestamp}")
 
-            # 6. 生成Word报告（聚焦核心结论）
-            report_title = Path(data_path).stem + "_分析报告"
-            word_report_path = self.generate_word_report(analysis_data, chart_paths, report_title)
+                word_report_path = report_future.result()
 
             # 汇总所有输出
             outputs = {
@@ -1332,8 +1380,9 @@ class DataAnalysisPipeline:
             traceback.print_exc()
             return None
 
-def parse_arguments():
-    """解析命令行参数"""
+@lru_cache(maxsize=None)
+def _build_parser():
+    """构建命令行解析器（进程内只构建一次）"""
     parser = argparse.ArgumentParser(
         description="业务数据市场洞察分析包生成器"
     )
@@ -1347,11 +1396,23 @@ def parse_arguments():
     parser.add_argument('--output-dir', dest='output_dir', help='可选：输出目录（默认与数据同级的outputs/）')
     parser.add_argument('--enable-charts', dest='enable_charts', action='store_true', help='已废弃：请使用 --charts-mode on/off/auto（默认auto）')
     parser.add_argument('--enable-screenshot', dest='enable_screenshot', action='store_true', help='如需生成截图可开启，默认关闭')
-    parser.add_argument('--charts-mode', dest='charts_mode', choices=['auto', 'on', 'off'], default='auto',
+    parser.add_argument('--charts-mode', dest='charts_mode', choices=['auto', 'on', 'off'], default=None,
                         help='图表生成策略：auto(默认，只有数据有价值时生成)/on(强制生成)/off(关闭)')
     parser.add_argument('--core-dimension', dest='core_dimension', help='可选：核心实体维度列，如医院/客户/渠道/门店/品牌等')
+    parser.add_argument('--chart-workers', dest='chart_workers', type=int,
+                        help='可选：图表并行渲染进程数（默认 1 顺序渲染）')
     parser.add_argument('--target-brand', dest='target_brand', help='可选：目标品牌/申报企业，用于白区/机会分析')
-    return parser.parse_args()
+    return parser
+
+
+@lru_cache(maxsize=4)
+def _parse_argv(argv):
+    return _build_parser().parse_args(list(argv))
+
+
+def parse_arguments(argv=None):
+    """解析命令行参数（argv 默认取 sys.argv[1:]；相同参数复用上次的解析结果，调用方不应修改返回值）"""
+    return _parse_argv(tuple(sys.argv[1:] if argv is None else argv))
 
 
 def main():
@@ -1368,23 +1429,12 @@ def main():
         print(f"错误: 文件 {data_path} 不存在")
         sys.exit(1)
 
-    config = {}
-    if args.time_column:
-        config['time_column'] = args.time_column
-    if args.value_column:
-        config['value_column'] = args.value_column
-    if args.output_dir:
-        config['output_dir'] = args.output_dir
+    config = {name: getattr(args, name) for name in _CONFIG_ARGS if getattr(args, name)}
+    # --enable-charts 只在未显式指定 --charts-mode 时生效（都未指定时由流水线按 auto 处理）
     if args.enable_charts:
-        config['charts_mode'] = 'on'
-    if args.charts_mode:
-        config['charts_mode'] = args.charts_mode
+        config.setdefault('charts_mode', 'on')
     if args.enable_screenshot:
         config['enable_screenshot'] = True
-    if args.core_dimension:
-        config['core_dimension'] = args.core_dimension
-    if args.target_brand:
-        config['target_brand'] = args.target_brand
 
     pipeline = DataAnalysisPipeline(config=config)
     results = pipeline.run_full_pipeline(data_path, sheet_name, company_name)
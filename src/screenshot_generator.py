@@ -6,122 +6,453 @@
 """
 
 import asyncio
+import html
+import multiprocessing
+import multiprocessing.util
 import os
+import re
+import threading
 from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+
+def _load_async_playwright():
+    """按需导入 Playwright（导入会带入整个驱动，截图默认关闭时不必加载），未安装时返回 None"""
+    try:
+        from playwright.async_api import async_playwright
+    except ModuleNotFoundError:
+        return None
+    return async_playwright
+
+
+def _load_pyvips():
+    """按需导入 pyvips，未安装或系统缺少 libvips 时返回 None（退回 PIL）"""
+    try:
+        import pyvips
+    except (ModuleNotFoundError, OSError):
+        return None
+    return pyvips
+
+
+def _closes_unmanaged_browser(method):
+    """公开异步接口的包装：不在 async with 内、也不经同步接口调用时，调用结束即关闭浏览器，
+    避免 asyncio.run(...) 结束后浏览器进程残留；需要跨多次调用复用浏览器时用 async with"""
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        self._active_calls += 1
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            self._active_calls -= 1
+            if not self._active_calls and not self._managed and asyncio.get_running_loop() is not self._loop:
+                await self.aclose()
+    return wrapper
+
+
+def _file_url(path):
+    """本地路径转为 file:// URL（绝对路径、按 URL 规则转义；相对路径按调用时的工作目录解析，不缓存）"""
+    return Path(os.path.abspath(path)).as_uri()
+
+
+# 截图默认格式与 JPEG 质量（整页 PNG 编码慢、体积大；需要无损或透明时传 image_format='png'）
+_DEFAULT_IMAGE_FORMAT = 'jpeg'
+_DEFAULT_JPEG_QUALITY = 85
+# 默认设备像素比：1 倍已够预览与对比；打印级导出传 dpr=2（像素数为 4 倍，渲染、编码都更慢）
+_DEFAULT_DPR = 1
+# 截图格式对应的文件扩展名
+_IMAGE_EXTENSIONS = {'jpeg': '.jpg', 'png': '.png'}
+# 缩放后 PNG 的 zlib 压缩级别（optimize=True 会逐级试压，慢数倍而体积只小几个百分点）
+_PNG_COMPRESS_LEVEL = 6
+# 截图页面只拦截网络请求（file:// 与 data: 不经过路由处理），非放行主机一律中止
+_NETWORK_URL_PATTERN = re.compile(r'^(https?|wss?)://')
+# 默认放行的主机（本机服务）；外部字体等可在构造时通过 allowed_hosts 追加
+_ALLOWED_HOSTS = frozenset({'localhost', '127.0.0.1'})
+# 截图用不到的资源类型，即使主机放行也中止
+_BLOCKED_RESOURCE_TYPES = frozenset({'media', 'websocket', 'eventsource'})
+# 页面就绪等待的上限（毫秒），超时后照常截图
+_READY_TIMEOUT_MS = 10000
+# 懒加载图片改为立即加载，并等字体就绪（截图要包含整页图片）
+_PREPARE_PAGE_SCRIPT = """async () => {
+    for (const img of document.images) img.loading = 'eager';
+    await document.fonts.ready;
+}"""
+# 页面内全部图片已加载（或加载失败）即视为就绪
+_IMAGES_READY_SCRIPT = "() => Array.from(document.images).every(img => img.complete)"
+
+# 对比页的固定页头与页尾、每个对比视图的片段（直接拼接，不经模板引擎）
+_COMPARISON_HEAD = """
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>数据对比分析</title>
+    <style>
+        body {
+            font-family: 'PingFang SC', 'Microsoft YaHei', sans-serif;
+            margin: 0;
+            padding: 20px;
+            background: #f5f5f5;
+        }
+        .comparison-container {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(600px, 1fr));
+            gap: 20px;
+            max-width: 100%;
+        }
+        .comparison-item {
+            background: white;
+            border-radius: 10px;
+            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+        .comparison-item iframe {
+            width: 100%;
+            height: 800px;
+            border: none;
+        }
+        .comparison-title {
+            background: #2C3E50;
+            color: white;
+            padding: 15px;
+            text-align: center;
+            font-weight: bold;
+        }
+        .header {
+            text-align: center;
+            margin-bottom: 30px;
+            padding: 20px;
+            background: white;
+            border-radius: 10px;
+            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        }
+        .header h1 {
+            color: #2C3E50;
+            margin: 0;
+        }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>数据分析对比报告</h1>
+        <p>多维度数据可视化对比</p>
+    </div>
+
+    <div class="comparison-container">
+"""
+_COMPARISON_ITEM = """        <div class="comparison-item">
+            <div class="comparison-title">分析视图 {index}</div>
+            <iframe src="{url}"></iframe>
+        </div>
+"""
+# 子报告内联进对比页：放进声明式 shadow root，子报告样式只作用于自身视图
+_COMPARISON_INLINE_ITEM = """        <div class="comparison-item">
+            <div class="comparison-title">分析视图 {index}</div>
+            <div><template shadowrootmode="open">{styles}{body}</template></div>
+        </div>
+"""
+# 子报告的 <body> 内容与 <style> 块
+_BODY_RE = re.compile(r'<body[^>]*>(.*?)</body>', re.DOTALL | re.IGNORECASE)
+_STYLE_RE = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL | re.IGNORECASE)
+# 子报告样式里的文档根选择器（:root、html、body），在 shadow root 中改为 :host（即该视图容器），
+# 模板的 CSS 变量定义在 :root 上，不改写则 shadow root 内取不到
+_ROOT_SELECTOR_RE = re.compile(r'(?<![\w.#:-])(?:html|body)(?![\w-])|:root(?![\w-])')
+# 相对路径的 src（排除带协议的、data: 与锚点），内联后需按子报告所在目录改写
+_RELATIVE_SRC_RE = re.compile(r'(\ssrc=")(?![a-zA-Z][a-zA-Z0-9+.-]*:|#)([^"]*)"')
+# shadow root 内的图片不在 document.images 中，就绪脚本改不到，内联时直接去掉懒加载
+_LAZY_LOADING_RE = re.compile(r'\sloading="lazy"', re.IGNORECASE)
+_COMPARISON_TAIL = """    </div>
+</body>
+</html>
+"""
 
-try:
-    from playwright.async_api import async_playwright
-except ModuleNotFoundError:
-    async_playwright = None
 
 class ScreenshotGenerator:
     """截图生成器类"""
 
-    def __init__(self, output_dir='outputs/screenshots'):
+    def __init__(self, output_dir='outputs/screenshots', allowed_hosts=None):
+        """
+        Args:
+            allowed_hosts: 截图时额外放行的网络主机（如外部字体 CDN），其余外部请求直接中止
+        """
         self.output_dir = output_dir
+        self.allowed_hosts = _ALLOWED_HOSTS.union(allowed_hosts or ())
+        # 浏览器按需启动一次，之后的截图复用同一进程，每次只新建隔离的 context
+        self._playwright = None
+        self._browser = None
+        self._browser_loop = None
+        self._browser_lock = None
+        # async with 范围内保持浏览器常驻；范围外直接调用的异步接口按进行中的调用数在结束时关闭
+        self._managed = False
+        self._active_calls = 0
+        # 同步接口共用的后台事件循环（首次同步调用时启动），浏览器常驻其上供多次同步调用复用
+        self._loop = None
+        self._loop_thread = None
         self.create_output_dir()
 
     def create_output_dir(self):
         """创建输出目录"""
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def __aenter__(self):
+        self._managed = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._managed = False
+        await self.aclose()
+
+    async def _ensure_browser(self):
+        """取已启动的浏览器，首次调用时启动（Playwright 对象绑定事件循环，换了循环则重新启动）"""
+        loop = asyncio.get_running_loop()
+        if self._browser_loop is not loop:
+            # 旧循环已结束，其上的对象无法再使用或关闭，直接丢弃
+            self._playwright = self._browser = None
+            self._browser_lock = asyncio.Lock()
+            self._browser_loop = loop
+        async with self._browser_lock:
+            if self._browser is None:
+                async_playwright = _load_async_playwright()
+                if async_playwright is None:
+                    raise ModuleNotFoundError("缺少 playwright 依赖，请安装后再启用 --enable-screenshot")
+                playwright = await async_playwright().start()
+                try:
+                    self._browser = await playwright.chromium.launch(
+                        headless=True,
+                        args=['--no-sandbox', '--disable-setuid-sandbox']
+                    )
+                except Exception:
+                    await playwright.stop()
+                    raise
+                self._playwright = playwright
+        return self._browser
+
+    async def _route_request(self, route):
+        """放行本机及 allowed_hosts 的请求，其余外部请求与无关资源类型中止"""
+        request = route.request
+        if request.resource_type in _BLOCKED_RESOURCE_TYPES or urlparse(request.url).hostname not in self.allowed_hosts:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @staticmethod
+    async def _capture(page, path, full_page, image_format, quality):
+        """截取页面；quality 只对 JPEG 有效，PNG 传入会被 Playwright 拒绝"""
+        options = {'path': path, 'full_page': full_page, 'type': image_format}
+        if image_format == 'jpeg':
+            options['quality'] = quality
+        await page.screenshot(**options)
+
+    @staticmethod
+    async def _wait_until_ready(page):
+        """等页面图片与字体就绪，代替固定等待；超时不报错，按当前状态截图"""
+        try:
+            await page.evaluate(_PREPARE_PAGE_SCRIPT)
+            await page.wait_for_function(_IMAGES_READY_SCRIPT, timeout=_READY_TIMEOUT_MS)
+        except Exception as e:
+            print(f"等待页面就绪超时，按当前状态截图: {e}")
+
+    async def aclose(self):
+        """关闭复用的浏览器与 Playwright"""
+        browser, playwright = self._browser, self._playwright
+        self._browser = self._playwright = None
+        if browser is not None:
+            await browser.close()
+        if playwright is not None:
+            await playwright.stop()
+
+    def _run_sync(self, coro):
+        """在后台事件循环上执行协程并等待结果（不再每次 asyncio.run 新建、销毁事件循环）"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+            self._loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        """关闭浏览器并停止后台事件循环（同步接口用完后调用）"""
+        loop, thread = self._loop, self._loop_thread
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+        finally:
+            self._loop = self._loop_thread = None
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    @_closes_unmanaged_browser
     async def generate_screenshot(self, html_path, output_name=None,
-                                width=1920, height=1080, full_page=True):
+                                width=1920, height=1080, full_page=True,
+                                image_format=_DEFAULT_IMAGE_FORMAT, quality=_DEFAULT_JPEG_QUALITY, dpr=_DEFAULT_DPR):
         """
         生成截图
 
         Args:
             html_path: HTML文件路径
-            output_name: 输出文件名
+            output_name: 输出文件名（不含扩展名）
             width: 截图宽度
             height: 截图高度
             full_page: 是否截取整个页面
+            image_format: 'jpeg' 或 'png'
+            quality: JPEG 质量（PNG 忽略）
+            dpr: 设备像素比，打印级导出用 2
 
         Returns:
             str: 截图文件路径
         """
-        if async_playwright is None:
+        file_url = _file_url(html_path)
+
+        async def load(page):
+            await page.goto(file_url, wait_until='load', timeout=30000)
+
+        return await self._screenshot(load, output_name, width, height, full_page, image_format, quality, dpr)
+
+    @_closes_unmanaged_browser
+    async def screenshot_html(self, html_content, output_name=None,
+                              width=1920, height=1080, full_page=True,
+                              image_format=_DEFAULT_IMAGE_FORMAT, quality=_DEFAULT_JPEG_QUALITY, base_dir=None,
+                              dpr=_DEFAULT_DPR):
+        """
+        直接对HTML文本截图，不写临时文件
+
+        页面先打开 base_dir（默认输出目录）取得 file:// 来源，再替换为该HTML，
+        其中的 file:// iframe 与相对路径资源仍可加载。其余参数同 generate_screenshot。
+
+        Returns:
+            str: 截图文件路径
+        """
+        base_url = _file_url(base_dir or self.output_dir) + '/'
+
+        async def load(page):
+            await page.goto(base_url, wait_until='load', timeout=30000)
+            await page.set_content(html_content, wait_until='load', timeout=30000)
+
+        return await self._screenshot(load, output_name, width, height, full_page, image_format, quality, dpr)
+
+    async def _screenshot(self, load, output_name, width, height, full_page, image_format, quality, dpr):
+        """新建 context 与页面，按 load(page) 加载内容后等待就绪并截图"""
+        if _load_async_playwright() is None:
             raise ModuleNotFoundError("缺少 playwright 依赖，请安装后再启用 --enable-screenshot")
         if not output_name:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_name = f"infographic_{timestamp}"
 
         try:
-            async with async_playwright() as p:
-                try:
-                    # 启动浏览器
-                    browser = await p.chromium.launch(
-                        headless=True,
-                        args=['--no-sandbox', '--disable-setuid-sandbox']
-                    )
-                except Exception as e:
-                    print(f"截图生成失败（浏览器启动失败）: {e}")
-                    return None
-
-                # 创建新页面
-                page = await browser.new_page(
-                    viewport={'width': width, 'height': height},
-                    device_scale_factor=2  # 高DPI以获得更清晰的截图
-                )
+            browser = await self._ensure_browser()
+        except Exception as e:
+            print(f"截图生成失败（浏览器启动失败）: {e}")
+            return None
 
-                try:
-                    # 加载HTML文件
-                    file_url = f"file://{os.path.abspath(html_path)}"
-                    await page.goto(file_url, wait_until='networkidle', timeout=30000)
-
-                    # 等待页面完全加载
-                    await page.wait_for_load_state('domcontentloaded')
-                    await page.wait_for_timeout(2000)  # 额外等待动画完成
-
-                    # 生成截图路径
-                    screenshot_path = os.path.join(self.output_dir, f"{output_name}.png")
-
-                    # 截取页面
-                    await page.screenshot(
-                        path=screenshot_path,
-                        full_page=full_page,
-                        type='png',
-                        quality=100
-                    )
+        try:
+            # 每张截图用独立的 context，互不共享缓存与存储
+            context = await browser.new_context(
+                viewport={'width': width, 'height': height},
+                device_scale_factor=dpr
+            )
+            # 外部统计脚本、字体、地图瓦片等不参与渲染结果，直接中止，不等网络超时
+            await context.route(_NETWORK_URL_PATTERN, self._route_request)
+        except Exception as e:
+            print(f"截图生成失败: {e}")
+            return None
 
-                    print(f"截图已生成: {screenshot_path}")
-                    return screenshot_path
+        try:
+            page = await context.new_page()
 
-                except Exception as e:
-                    print(f"截图生成失败: {e}")
-                    return None
+            # 加载页面内容
+            await load(page)
+
+            # 等待图片与字体就绪（不再固定多等 2 秒）
+            await self._wait_until_ready(page)
+
+            # 生成截图路径
+            screenshot_path = os.path.join(self.output_dir, output_name + _IMAGE_EXTENSIONS[image_format])
+
+            # 截取页面
+            await self._capture(page, screenshot_path, full_page, image_format, quality)
+
+            print(f"截图已生成: {screenshot_path}")
+            return screenshot_path
 
-                finally:
-                    await browser.close()
         except Exception as e:
-            print(f"截图生成失败（Playwright初始化失败）: {e}")
+            print(f"截图生成失败: {e}")
             return None
 
+        finally:
+            await context.close()
+
     def generate_screenshot_sync(self, html_path, output_name=None,
-                               width=1920, height=1080, full_page=True):
+                               width=1920, height=1080, full_page=True,
+                               image_format=_DEFAULT_IMAGE_FORMAT, quality=_DEFAULT_JPEG_QUALITY, dpr=_DEFAULT_DPR):
         """
         同步生成截图
 
         Args:
             html_path: HTML文件路径
-            output_name: 输出文件名
+            output_name: 输出文件名（不含扩展名）
             width: 截图宽度
             height: 截图高度
             full_page: 是否截取整个页面
+            image_format: 'jpeg' 或 'png'
+            quality: JPEG 质量（PNG 忽略）
+            dpr: 设备像素比，打印级导出用 2
 
         Returns:
             str: 截图文件路径
         """
-        return asyncio.run(self.generate_screenshot(
-            html_path, output_name, width, height, full_page))
+        return self._run_sync(self.generate_screenshot(
+            html_path, output_name, width, height, full_page, image_format, quality, dpr))
 
-    async def generate_multiple_sizes(self, html_path, base_name):
+    @_closes_unmanaged_browser
+    async def generate_batch(self, jobs, max_concurrency=4):
+        """
+        批量生成截图：同一浏览器内并发截图，同时进行的页面数不超过 max_concurrency
+
+        Args:
+            jobs: [{'html_path', 'output_name', 'width', 'height', 'full_page'}, ...]，除 html_path 外均可省略
+            max_concurrency: 最大并发页面数（限制内存峰值）
+
+        Returns:
+            list: 与 jobs 顺序一致的截图路径（失败的为 None）
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # 未指定文件名时按序号区分，避免同一秒内的默认时间戳文件名相互覆盖
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        async def run(index, job):
+            job = dict(job)
+            if not job.get('output_name'):
+                job['output_name'] = f"infographic_{timestamp}_{index + 1}"
+            async with semaphore:
+                return await self.generate_screenshot(**job)
+
+        return list(await asyncio.gather(*(run(i, job) for i, job in enumerate(jobs))))
+
+    def generate_batch_sync(self, jobs, max_concurrency=4):
+        """同步批量生成截图，参数与返回值同 generate_batch"""
+        return self._run_sync(self.generate_batch(jobs, max_concurrency))
+
+    @_closes_unmanaged_browser
+    async def generate_multiple_sizes(self, html_path, base_name,
+                                      image_format=_DEFAULT_IMAGE_FORMAT, quality=_DEFAULT_JPEG_QUALITY, dpr=_DEFAULT_DPR):
         """
         生成多种尺寸的截图
 
         Args:
             html_path: HTML文件路径
             base_name: 基础文件名
+            image_format: 'jpeg' 或 'png'
+            quality: JPEG 质量（PNG 忽略）
+            dpr: 设备像素比，打印级导出用 2
 
         Returns:
             dict: 不同尺寸的截图路径
@@ -132,147 +463,77 @@ class ScreenshotGenerator:
             'mobile': {'width': 375, 'height': 667}
         }
 
-        paths = {}
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
+        browser = await self._ensure_browser()
+        file_url = _file_url(html_path)
 
+        async def capture(size_name, dimensions):
+            context = await browser.new_context(
+                viewport={'width': dimensions['width'], 'height': dimensions['height']},
+                device_scale_factor=dpr
+            )
             try:
-                for size_name, dimensions in sizes.items():
-                    page = await browser.new_page(
-                        viewport={'width': dimensions['width'], 'height': dimensions['height']},
-                        device_scale_factor=2
-                    )
+                page = await context.new_page()
+                await page.goto(file_url, wait_until='load')
+                await self._wait_until_ready(page)
 
-                    file_url = f"file://{os.path.abspath(html_path)}"
-                    await page.goto(file_url, wait_until='networkidle')
-                    await page.wait_for_timeout(2000)
-
-                    screenshot_path = os.path.join(
-                        self.output_dir, f"{base_name}_{size_name}.png"
-                    )
-
-                    await page.screenshot(
-                        path=screenshot_path,
-                        full_page=True,
-                        type='png',
-                        quality=100
-                    )
-
-                    paths[size_name] = screenshot_path
-                    await page.close()
+                screenshot_path = os.path.join(
+                    self.output_dir, f"{base_name}_{size_name}{_IMAGE_EXTENSIONS[image_format]}"
+                )
 
+                await self._capture(page, screenshot_path, True, image_format, quality)
+                return size_name, screenshot_path
             finally:
-                await browser.close()
+                await context.close()
 
-        return paths
+        # 各尺寸在同一浏览器内各开页面并发加载与截图，总耗时取最慢的一张而非逐张相加
+        results = await asyncio.gather(*(capture(name, dims) for name, dims in sizes.items()))
+        return dict(results)
 
-    def create_comparison_screenshot(self, html_paths, output_name="comparison"):
+    def create_comparison_screenshot(self, html_paths, output_name="comparison", dpr=_DEFAULT_DPR):
         """
         创建对比截图（多个HTML文件并排显示）
 
         Args:
             html_paths: HTML文件路径列表
             output_name: 输出文件名
+            dpr: 设备像素比，打印级导出用 2
 
         Returns:
             str: 对比截图路径
         """
-        # 创建对比HTML
+        # 创建对比HTML，直接载入页面截图（不写临时文件）
         comparison_html = self.create_comparison_html(html_paths)
 
-        # 保存临时HTML文件
-        temp_html_path = os.path.join(self.output_dir, f"temp_comparison.html")
-        with open(temp_html_path, 'w', encoding='utf-8') as f:
-            f.write(comparison_html)
+        return self._run_sync(self.screenshot_html(comparison_html, output_name, width=2560, height=1440, dpr=dpr))
 
-        # 生成截图
-        screenshot_path = self.generate_screenshot_sync(
-            temp_html_path, output_name, width=2560, height=1440
+    def create_comparison_html(self, html_paths):
+        """创建对比HTML（子报告直接内联，只需加载一个文档；读不到的退回 iframe）"""
+        items = "".join(
+            self._comparison_item(i, path)
+            for i, path in enumerate(html_paths, start=1)
         )
+        return _COMPARISON_HEAD + items + _COMPARISON_TAIL
 
-        # 清理临时文件
+    @staticmethod
+    def _comparison_item(index, path):
+        """单个对比视图：读取子报告，取其样式与 body 内联；读取失败或无 body 时用 iframe"""
         try:
-            os.remove(temp_html_path)
-        except:
-            pass
-
-        return screenshot_path
-
-    def create_comparison_html(self, html_paths):
-        """创建对比HTML"""
-        template = """
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>数据对比分析</title>
-    <style>
-        body {
-            font-family: 'PingFang SC', 'Microsoft YaHei', sans-serif;
-            margin: 0;
-            padding: 20px;
-            background: #f5f5f5;
-        }
-        .comparison-container {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(600px, 1fr));
-            gap: 20px;
-            max-width: 100%;
-        }
-        .comparison-item {
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }
-        .comparison-item iframe {
-            width: 100%;
-            height: 800px;
-            border: none;
-        }
-        .comparison-title {
-            background: #2C3E50;
-            color: white;
-            padding: 15px;
-            text-align: center;
-            font-weight: bold;
-        }
-        .header {
-            text-align: center;
-            margin-bottom: 30px;
-            padding: 20px;
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        }
-        .header h1 {
-            color: #2C3E50;
-            margin: 0;
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>数据分析对比报告</h1>
-        <p>多维度数据可视化对比</p>
-    </div>
-
-    <div class="comparison-container">
-        {% for i, path in enumerate(html_paths) %}
-        <div class="comparison-item">
-            <div class="comparison-title">分析视图 {{ i + 1 }}</div>
-            <iframe src="file://{{ path }}"></iframe>
-        </div>
-        {% endfor %}
-    </div>
-</body>
-</html>
-        """
-
-        from jinja2 import Template
-        tmpl = Template(template)
-        return tmpl.render(html_paths=html_paths)
+            with open(path, encoding='utf-8') as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError):
+            source = ''
+        body = _BODY_RE.search(source)
+        if body is None:
+            return _COMPARISON_ITEM.format(index=index, url=html.escape(_file_url(path)))
+
+        base_url = _file_url(path)
+        head = source[:body.start()]
+        styles = "".join(_ROOT_SELECTOR_RE.sub(':host', style) for style in _STYLE_RE.findall(head))
+        content = _RELATIVE_SRC_RE.sub(
+            lambda m: f'{m.group(1)}{html.escape(urljoin(base_url, html.unescape(m.group(2))))}"',
+            _LAZY_LOADING_RE.sub('', body.group(1)),
+        )
+        return _COMPARISON_INLINE_ITEM.format(index=index, styles=styles, body=content)
 
     def optimize_screenshot(self, image_path, quality=95, max_width=None):
         """
@@ -280,25 +541,52 @@ class ScreenshotGenerator:
 
         Args:
             image_path: 图片路径
-            quality: 质量参数
-            max_width: 最大宽度
+            quality: JPEG 质量（PNG 无损，忽略该参数）
+            max_width: 最大宽度，未指定或原图不超过时直接返回原图
 
         Returns:
             str: 优化后的图片路径
         """
+        # 不需要缩小时直接返回原图：整页重新压缩耗时长，JPEG 再压一遍只会更失真
+        if not max_width:
+            return image_path
+        root, ext = os.path.splitext(image_path)
+        optimized_path = f"{root}_optimized{ext}"
+        is_jpeg = ext.lower() in ('.jpg', '.jpeg')
+
+        pyvips = _load_pyvips()
+        if pyvips is not None:
+            # libvips 顺序流式读取并缩放，不把整张高分屏截图解码进内存
+            try:
+                image = pyvips.Image.new_from_file(image_path, access='sequential')
+                if image.width <= max_width:
+                    return image_path
+                thumb = image.thumbnail_image(max_width)
+                if is_jpeg:
+                    thumb.write_to_file(optimized_path, Q=quality)
+                else:
+                    thumb.write_to_file(optimized_path, compression=_PNG_COMPRESS_LEVEL)
+                return optimized_path
+            except pyvips.Error as e:
+                print(f"libvips 处理失败，改用 PIL: {e}")
+
         try:
             from PIL import Image
 
             with Image.open(image_path) as img:
-                # 如果需要调整尺寸
-                if max_width and img.width > max_width:
-                    ratio = max_width / img.width
-                    new_height = int(img.height * ratio)
-                    img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
+                # 只读取了文件头，不缩放时不解码像素
+                if img.width <= max_width:
+                    return image_path
+
+                ratio = max_width / img.width
+                new_height = int(img.height * ratio)
+                img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
 
-                # 保存优化后的图片
-                optimized_path = image_path.replace('.png', '_optimized.png')
-                img.save(optimized_path, 'PNG', quality=quality, optimize=True)
+                # 保存优化后的图片（保持原格式）
+                if is_jpeg:
+                    img.save(optimized_path, 'JPEG', quality=quality, optimize=True)
+                else:
+                    img.save(optimized_path, 'PNG', compress_level=_PNG_COMPRESS_LEVEL)
 
                 return optimized_path
 
@@ -308,3 +596,64 @@ class ScreenshotGenerator:
         except Exception as e:
             print(f"图片优化失败: {e}")
             return image_path
+
+
+# 进程池中每个工作进程各自持有的截图生成器（浏览器在进程内复用）
+_WORKER_GENERATOR = None
+
+
+def _init_screenshot_worker(output_dir, allowed_hosts):
+    """工作进程初始化：创建本进程的截图生成器，进程正常退出时关闭浏览器"""
+    global _WORKER_GENERATOR
+    _WORKER_GENERATOR = ScreenshotGenerator(output_dir, allowed_hosts)
+    multiprocessing.util.Finalize(None, _WORKER_GENERATOR.close, exitpriority=10)
+
+
+def _screenshot_worker(job):
+    """工作进程中执行单个截图任务，参数同 generate_screenshot"""
+    return _WORKER_GENERATOR.generate_screenshot_sync(**job)
+
+
+class ScreenshotPool:
+    """多进程截图池：每个工作进程各自启动一个浏览器，截图任务分发到各进程并行执行"""
+
+    def __init__(self, output_dir='outputs/screenshots', processes=None, allowed_hosts=None):
+        """
+        Args:
+            processes: 工作进程数，默认 CPU 核数的一半（每个进程还会带起一组浏览器进程）
+            allowed_hosts: 同 ScreenshotGenerator
+        """
+        if processes is None:
+            processes = max(1, (os.cpu_count() or 1) // 2)
+        # spawn 启动：不继承父进程的事件循环线程与 Playwright 状态
+        self._pool = multiprocessing.get_context('spawn').Pool(
+            processes, initializer=_init_screenshot_worker, initargs=(output_dir, allowed_hosts)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def map(self, jobs):
+        """
+        分发截图任务并等待全部完成
+
+        Args:
+            jobs: 同 ScreenshotGenerator.generate_batch
+
+        Returns:
+            list: 与 jobs 顺序一致的截图路径（失败的为 None）
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        jobs = [
+            job if job.get('output_name') else {**job, 'output_name': f"infographic_{timestamp}_{i + 1}"}
+            for i, job in enumerate(jobs)
+        ]
+        return self._pool.map(_screenshot_worker, jobs, chunksize=1)
+
+    def close(self):
+        """停止接收任务，等各工作进程关闭浏览器后退出"""
+        self._pool.close()
+        self._pool.join()
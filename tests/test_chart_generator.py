@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""图表生成器：多进程并行渲染与顺序渲染结果一致"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from matplotlib import image as mpimg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import chart_generator  # noqa: E402
+from chart_generator import ChartGenerator  # noqa: E402
+
+
+def _analysis_results():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(50, 3))
+    return {
+        '相关性矩阵': pd.DataFrame(values, columns=['销量', '金额', '单价']).corr(),
+        '时间趋势': pd.DataFrame({
+            '时间': pd.date_range('2024-01-01', periods=12, freq='MS'),
+            '数值': rng.integers(100, 200, size=12),
+        }),
+    }
+
+
+class TestParallelRender(unittest.TestCase):
+
+    def render(self, output_dir, max_workers):
+        generator = ChartGenerator(output_dir=output_dir, png_dpi=50)
+        return generator.generate_all_charts(_analysis_results(), max_workers=max_workers)
+
+    def test_pool_matches_sequential(self):
+        with tempfile.TemporaryDirectory() as seq_dir, tempfile.TemporaryDirectory() as par_dir:
+            sequential = self.render(seq_dir, max_workers=1)
+            with mock.patch.object(chart_generator, 'ProcessPoolExecutor',
+                                   wraps=chart_generator.ProcessPoolExecutor) as pool:
+                parallel = self.render(par_dir, max_workers=2)
+            pool.assert_called_once()
+
+            self.assertEqual(set(sequential), {'correlation_heatmap', 'time_trend'})
+            self.assertEqual(set(parallel), set(sequential))
+            for key, paths in sequential.items():
+                self.assertEqual(set(parallel[key]), set(paths))
+                np.testing.assert_array_equal(mpimg.imread(parallel[key]['png']), mpimg.imread(paths['png']))
+
+
+if __name__ == '__main__':
+    unittest.main()